@@ -0,0 +1,78 @@
+"""
+Compare the alignment strategies for speed and quality.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_align.py [N ...]
+
+Each strategy is run on the extractions in ``tests/data``, and on synthetic
+extractions (see :mod:`evaluation.synthetic`) of ``N`` references (default:
+200 and 1000), for which the correct alignment is known.
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter
+sys.path.append('.')
+
+from arxiv.base import logging
+from references.domain import Reference
+from references.process.merge import align
+from evaluation import synthetic
+logging.getLogger('references.process.merge').setLevel(40)
+
+FIXTURES = [
+    ('0801.0012', ['cermine', 'grobid', 'refextract']),
+    ('1704.01689v1', ['cermine', 'grobid', 'scienceparse-formatted']),
+    ('1702.07336', ['cermine', 'grobid'])
+]
+
+
+def load_fixture(document_id: str, extractor: str) -> list:
+    path = os.path.join('tests', 'data', '%s.%s.json' % (document_id,
+                                                         extractor))
+    with open(path) as f:
+        return [Reference(**{k: v for k, v in datum.items()
+                             if k in Reference.__annotations__})
+                for datum in json.load(f)]
+
+
+def _timed(records: dict, strategy: str) -> tuple:
+    start = time.time()
+    aligned = align.align_records(records, strategy=strategy)
+    return aligned, time.time() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [200, 1000]
+
+    print('document\tstrategy\tseconds\tclusters\tcomplete')
+    for document_id, extractors in FIXTURES:
+        records = {extractor: load_fixture(document_id, extractor)
+                   for extractor in extractors}
+        for strategy in align.STRATEGIES:
+            aligned, elapsed = _timed(records, strategy)
+            complete = sum(1 for c in aligned if len(c) == len(extractors))
+            print('%s\t%s\t%.3f\t%i\t%i' % (document_id, strategy, elapsed,
+                                            len(aligned), complete))
+
+    print('\nN\tstrategy\tseconds\tclusters\tprecision\trecall')
+    for N in sizes:
+        records, origin = synthetic.generate(N)
+        # Each original reference should be aligned across every extraction
+        # in which it appears.
+        found = Counter(origin.values())
+        expected = sum(n * (n - 1) // 2 for n in found.values())
+        for strategy in align.STRATEGIES:
+            aligned, elapsed = _timed(records, strategy)
+            pairs = {pair for cluster in aligned
+                     for pair in itertools.combinations(
+                        [(e, origin[id(r)]) for e, r in cluster], 2)}
+            correct = sum(1 for (_, a), (_, b) in pairs if a == b)
+            print('%i\t%s\t%.3f\t%i\t%.4f\t%.4f' % (
+                N, strategy, elapsed, len(aligned),
+                correct / max(1, len(pairs)), correct / expected
+            ))
@@ -0,0 +1,62 @@
+"""
+Measure the recall of LSH blocking against exhaustive alignment.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_blocking.py [N ...]
+
+Alignment with blocking forced on is compared with exhaustive alignment (all
+pairs) for the extractions in ``tests/data`` and for synthetic extractions
+(see :mod:`evaluation.synthetic`) of ``N`` references (default: 500 and
+2000). Recall is the fraction of aligned pairs of references found by the
+exhaustive alignment that are also found with blocking. Note that with the
+``global`` strategy, an extraction with many equally similar references (e.g.
+duplicates) may have several optimal alignments; blocking can change which
+of them is found without making the alignment any worse.
+"""
+
+import itertools
+import sys
+import time
+sys.path.append('.')
+
+from arxiv.base import logging
+from references.process.merge import align
+from evaluation import synthetic
+from evaluation.benchmark_align import FIXTURES, load_fixture
+logging.getLogger('references.process.merge').setLevel(40)
+
+
+def _pairs(aligned: list) -> set:
+    return {pair for cluster in aligned for pair in itertools.combinations(
+        [(extractor, id(ref)) for extractor, ref in cluster], 2
+    )}
+
+
+def _compare(label: str, records: dict) -> None:
+    for strategy in align.STRATEGIES:
+        start = time.time()
+        exhaustive = _pairs(align.align_records(records, strategy=strategy,
+                                                blocking_threshold=None))
+        elapsed = time.time() - start
+        start = time.time()
+        blocked = _pairs(align.align_records(records, strategy=strategy,
+                                             blocking_threshold=0))
+        elapsed_blocked = time.time() - start
+        found = len(exhaustive & blocked)
+        print('%s\t%s\t%.3f\t%.3f\t%.4f\t%.4f' % (
+            label, strategy, elapsed, elapsed_blocked,
+            found / max(1, len(exhaustive)), found / max(1, len(blocked))
+        ))
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 2000]
+
+    print('input\tstrategy\texhaustive (s)\tblocked (s)\trecall\tprecision')
+    for document_id, extractors in FIXTURES:
+        _compare(document_id, {extractor: load_fixture(document_id, extractor)
+                               for extractor in extractors})
+    for N in sizes:
+        records, _ = synthetic.generate(N)
+        _compare('N=%i' % N, records)
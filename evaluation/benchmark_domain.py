@@ -0,0 +1,107 @@
+"""
+Benchmark the domain objects: their memory use, and (de)serialization.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_domain.py [--size 1000] [--repeat 5]
+
+A :class:`.ReferenceSet` of ``--size`` synthetic references (see
+:mod:`evaluation.synthetic`) is created from plain ``dict`` data, and is
+loaded from its serialized form, both as a :class:`.ReferenceSet` and as a
+:class:`.ColumnarReferenceSet`. For each of these, the number of objects
+tracked by the garbage collector and the memory allocated (bytes, from
+:mod:`tracemalloc`) are reported. For each step of (de)serialization in
+either form, the best wall time (seconds) over ``--repeat`` runs is
+reported.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable
+sys.path.append('.')
+
+from references.domain import Author, Reference, ReferenceSet, \
+    ColumnarReferenceSet
+from evaluation import synthetic
+
+
+def load_data(size: int) -> list:
+    """Get plain data for ``size`` references, with :class:`.Author`."""
+    records, _ = synthetic.generate(size, 1)
+    return [dict(reference.to_dict(),
+                 authors=[Author(**author) for author in reference.authors])
+            for reference in records['a']]
+
+
+def create(data: list) -> ReferenceSet:
+    """Create a :class:`.ReferenceSet` from ``data``."""
+    return ReferenceSet(
+        document_id='1234.5678v1',
+        references=[Reference(**datum) for datum in data],
+        version='0.1',
+        score=0.9,
+        created=datetime.now(),
+        updated=datetime.now()
+    )
+
+
+def measure_memory(func: Callable[[], Any]) -> tuple:
+    """Count the objects made, and the bytes allocated, by ``func``."""
+    gc.collect()
+    before = len(gc.get_objects())
+    tracemalloc.start()
+    result = func()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects = len(gc.get_objects()) - before
+    del result
+    return objects, allocated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_data(args.size)
+    reference_set = create(data)
+    as_dict = reference_set.to_dict()
+    as_json = json.dumps(as_dict)
+    columnar = ColumnarReferenceSet.from_reference_set(reference_set)
+    columnar_dict = columnar.to_dict()
+    columnar_json = json.dumps(columnar_dict)
+    lossless = ReferenceSet.from_dict(json.loads(as_json)) == reference_set \
+        and ColumnarReferenceSet.from_dict(json.loads(columnar_json)) \
+        .to_reference_set() == reference_set
+
+    print('%i references\tobjects\tbytes' % len(reference_set.references))
+    for name, func in [
+            ('create', lambda: create(data)),
+            ('load', lambda: ReferenceSet.from_dict(json.loads(as_json))),
+            ('load columnar', lambda: ColumnarReferenceSet.from_dict(
+                json.loads(columnar_json)))]:
+        print('%s\t%i\t%i' % ((name,) + measure_memory(func)))
+
+    print('\noperation\tseconds\tlossless: %s' % lossless)
+    for operation, func in [
+            ('create', lambda: create(data)),
+            ('to_dict', reference_set.to_dict),
+            ('json.dumps', lambda: json.dumps(as_dict)),
+            ('json.loads', lambda: json.loads(as_json)),
+            ('from_dict', lambda: ReferenceSet.from_dict(as_dict)),
+            ('columnar from_reference_set',
+             lambda: ColumnarReferenceSet.from_reference_set(reference_set)),
+            ('columnar to_reference_set', columnar.to_reference_set),
+            ('columnar to_dict', columnar.to_dict),
+            ('columnar json.dumps', lambda: json.dumps(columnar_dict)),
+            ('columnar json.loads', lambda: json.loads(columnar_json)),
+            ('columnar from_dict',
+             lambda: ColumnarReferenceSet.from_dict(columnar_dict))]:
+        elapsed = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('%s\t%.4f' % (operation, elapsed))
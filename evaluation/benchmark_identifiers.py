@@ -0,0 +1,92 @@
+"""
+Benchmark :func:`.regex_identifiers.extract_identifiers` and
+:func:`.regex_identifiers.extract_identifiers_batch`.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_identifiers.py [--repeat 5]
+
+The scanner, on each line and on all of the lines at once, is compared with
+applying each pattern to every line, on ``TEST_POSITIVE`` and
+``TEST_NEGATIVE`` (see :mod:`.regex_arxiv`), and on a corpus of real raw
+reference lines: the ``raw`` values in the extractions in ``tests/data``, and
+each line of the BibTeX and ``.bbl`` files there. All three are also checked
+for identical output.
+"""
+
+import argparse
+import glob
+import json
+import sys
+import timeit
+sys.path.append('.')
+
+import regex as re
+
+from references.util import regex_arxiv, regex_identifiers
+
+
+def load_corpus() -> list:
+    """Get raw reference lines from ``tests/data``."""
+    lines = []
+    for path in sorted(glob.glob('tests/data/*.json')):
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except ValueError:
+                continue
+        if isinstance(data, dict):
+            data = data.get('references', [])
+        lines += [datum['raw'] for datum in data
+                  if isinstance(datum, dict)
+                  and isinstance(datum.get('raw'), str)]
+    for path in glob.glob('tests/data/*.bbl') + glob.glob('tests/data/*.bib'):
+        with open(path) as f:
+            lines += [line for line in f if line.strip()]
+    return lines
+
+
+def each_pattern(text: str) -> tuple:
+    """Apply every pattern to ``text``, as before the scanner."""
+    arxiv_ids = [regex_identifiers.longest_string(ID) for ID
+                 in re.findall(regex_arxiv.REGEX_ARXIV_FLEXIBLE, text)]
+    dois = re.findall(regex_identifiers.REGEX_DOI, text)
+    return (arxiv_ids[0] if arxiv_ids else None, dois[0] if dois else None,
+            re.findall(regex_identifiers.REGEX_ISBN_10, text)
+            + re.findall(regex_identifiers.REGEX_ISBN_13, text))
+
+
+def scanner(text: str) -> tuple:
+    """Apply the scanner to ``text``."""
+    reference = regex_identifiers.extract_identifiers(text)
+    return (reference.arxiv_id, reference.doi,
+            [ID.identifier for ID in reference.identifiers])
+
+
+def batch(lines: list) -> list:
+    """Apply the scanner to all of ``lines`` at once."""
+    return [(partial.get('arxiv_id'), partial.get('doi'),
+             [ID.identifier for ID in partial.get('identifiers', [])])
+            for partial in regex_identifiers.extract_identifiers_batch(lines)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpora = [('positive', regex_arxiv.TEST_POSITIVE),
+               ('negative', regex_arxiv.TEST_NEGATIVE),
+               ('corpus', load_corpus())]
+    print('lines\tmethod\tseconds\tidentical')
+    for name, lines in corpora:
+        expected = [each_pattern(line) for line in lines]
+        identical = expected == [scanner(line) for line in lines] \
+            == batch(lines)
+        for method, func in [
+                ('each-pattern', lambda: list(map(each_pattern, lines))),
+                ('scanner', lambda: list(map(scanner, lines))),
+                ('batch', lambda: batch(lines))]:
+            elapsed = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            print('%s (%i)\t%s\t%.4f\t%s' % (name, len(lines), method,
+                                             elapsed, identical))
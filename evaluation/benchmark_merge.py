@@ -0,0 +1,157 @@
+"""
+Benchmark each stage of :mod:`references.process.merge`.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_merge.py [--sizes 10 100 1000 5000]
+        [--extractors 2 4 6] [--repeat 3] [--output results.json]
+
+Normalization, alignment, validation, arbitration and filtering are run
+separately, and then end-to-end (:func:`.merge_records`), on each fixture in
+``tests/data`` (``*.{cermine,grobid,refextract}.json``) and on synthetic
+extractions (see :mod:`evaluation.synthetic`) of each size, for each number of
+extractors. For each input and stage the best wall time (seconds) over
+``--repeat`` runs, and the peak memory allocated by the stage (bytes, from
+:mod:`tracemalloc` in a separate run), are written out as JSON.
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+sys.path.append('.')
+
+from arxiv.base import logging
+from references.domain import Reference
+from references.process.merge import merge_records, align, arbitrate, \
+    beliefs, normalize, priors
+from evaluation import synthetic
+logging.getLogger('references.process.merge').setLevel(40)
+
+FIXTURE_EXTRACTORS = ['cermine', 'grobid', 'refextract']
+
+
+def load_fixtures() -> Dict[str, Dict[str, List[Reference]]]:
+    """Load the extractions for each document in ``tests/data``."""
+    documents: Dict[str, Dict[str, List[Reference]]] = defaultdict(dict)
+    for extractor in FIXTURE_EXTRACTORS:
+        for path in glob.glob(os.path.join('tests', 'data',
+                                           '*.%s.json' % extractor)):
+            document_id = os.path.basename(path)[:-len(extractor) - 6]
+            with open(path) as f:
+                documents[document_id][extractor] = [
+                    Reference(**{k: v for k, v in datum.items()
+                                 if k in Reference.__annotations__})
+                    for datum in json.load(f)
+                ]
+    return documents
+
+
+def synthetic_priors(records: Dict[str, list]) -> list:
+    """Borrow the priors of the real extractors for synthetic extractors."""
+    return [(extractor, priors.EXTRACTORS[i % len(priors.EXTRACTORS)][1])
+            for i, extractor in enumerate(records)]
+
+
+def stages(records: Dict[str, List[Reference]], extractor_priors: list) \
+        -> List[Tuple[str, Callable[[dict], Any]]]:
+    """
+    Get the stages of the merge, each of which takes the state so far.
+
+    Each stage reads its input from, and writes its output to, a ``dict``
+    that is shared by the stages of a single run.
+    """
+    N_extractions = len(records)
+
+    def _normalize(state: dict) -> None:
+        state['normalized'] = {
+            extractor: normalize.normalize_records(extraction)
+            for extractor, extraction in state['records'].items()
+        }
+
+    def _align(state: dict) -> None:
+        state['aligned'] = align.align_records(state['normalized'])
+
+    def _validate(state: dict) -> None:
+        state['valid'] = beliefs.validate(state['aligned'])
+
+    def _arbitrate(state: dict) -> None:
+        state['arbitrated'] = arbitrate.arbitrate_all(
+            state['aligned'], state['valid'], extractor_priors, N_extractions
+        )
+
+    def _filter(state: dict) -> None:
+        state['final'] = normalize.filter_records(state['arbitrated'])
+
+    def _merge(state: dict) -> None:
+        state['merged'] = merge_records(state['fresh'], extractor_priors)
+
+    return [('normalize', _normalize), ('align', _align),
+            ('validate', _validate), ('arbitrate', _arbitrate),
+            ('filter', _filter), ('end-to-end', _merge)]
+
+
+def run(records: Dict[str, List[Reference]], extractor_priors: list,
+        repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Measure the time and peak memory of each stage of the merge."""
+    results: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for attempt in range(repeat + 1):
+        # Normalization (and so merging) modifies references in place.
+        state = {'records': copy.deepcopy(records),
+                 'fresh': copy.deepcopy(records)}
+        measure_memory = attempt == repeat
+        for stage, func in stages(records, extractor_priors):
+            if measure_memory:
+                tracemalloc.start()
+                func(state)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[stage]['peak_memory'] = peak
+            else:
+                start = time.perf_counter()
+                func(state)
+                elapsed = time.perf_counter() - start
+                results[stage]['seconds'] = min(
+                    elapsed, results[stage].get('seconds', elapsed)
+                )
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 100, 1000, 5000])
+    parser.add_argument('--extractors', type=int, nargs='+',
+                        default=[2, 4, 6])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None,
+                        help='Write JSON here, rather than to stdout.')
+    args = parser.parse_args()
+
+    report = []
+    for document_id, records in sorted(load_fixtures().items()):
+        report.append({
+            'input': document_id,
+            'references': {e: len(refs) for e, refs in records.items()},
+            'stages': run(records, priors.EXTRACTORS, args.repeat)
+        })
+    for N in args.sizes:
+        for extractors in args.extractors:
+            records, _ = synthetic.generate(N, extractors)
+            report.append({
+                'input': 'synthetic-%i-%i' % (N, extractors),
+                'references': {e: len(refs) for e, refs in records.items()},
+                'stages': run(records, synthetic_priors(records), args.repeat)
+            })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,55 @@
+"""
+Compare :func:`.textutil._clean_text` with its regex reference implementation.
+
+Run from the root of the repository::
+
+    python evaluation/benchmark_textutil.py [--repeat 5]
+
+Both implementations are applied to every reference (as ``str``) and every
+``raw`` and ``title`` value in the extractions in ``tests/data``, and the best
+total time over ``--repeat`` runs is reported for each.
+"""
+
+import argparse
+import glob
+import json
+import sys
+import timeit
+sys.path.append('.')
+
+from references.process import textutil
+
+
+def load_texts() -> list:
+    """Get some realistic text from the extractions in ``tests/data``."""
+    texts = []
+    for path in sorted(glob.glob('tests/data/*.json')):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('references', [])
+        for datum in data:
+            if not isinstance(datum, dict):
+                continue
+            texts.append(str(datum))
+            texts += [datum[key] for key in ('raw', 'title')
+                      if isinstance(datum.get(key), str)]
+    return texts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts()
+    print('%i texts, %i characters' % (len(texts), sum(map(len, texts))))
+    print('implementation\tnumok\tseconds')
+    for name, func in [('regex', textutil._clean_text_regex),
+                       ('translate', textutil._clean_text)]:
+        for numok in (False, True):
+            elapsed = min(timeit.repeat(
+                lambda: [func(text, numok=numok) for text in texts],
+                number=1, repeat=args.repeat
+            ))
+            print('%s\t%s\t%.4f' % (name, numok, elapsed))
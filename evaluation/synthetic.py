@@ -0,0 +1,77 @@
+"""Synthetic extractions with known alignment, for benchmarking."""
+
+import random
+import string
+import sys
+from typing import Dict, List, Tuple
+sys.path.append('.')
+
+from references.domain import Reference
+
+SOURCES = ['Phys. Rev. D', 'Phys. Rev. Lett.', 'JHEP', 'Nucl. Phys. B',
+           'Astrophys. J.', 'Mon. Not. R. Astron. Soc.']
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase)
+                   for _ in range(rng.randint(3, 9)))
+
+
+def generate(N: int, extractors: int = 3, seed: int = 2, drop: float = 0.05) \
+        -> Tuple[Dict[str, List[Reference]], Dict[int, int]]:
+    """
+    Generate ``extractors`` noisy extractions of the same ``N`` references.
+
+    Titles are drawn from a Zipf-distributed vocabulary, so that (as in real
+    bibliographies) some words are shared by many references. Each extractor
+    drops a fraction ``drop`` of the references, and blanks or changes the
+    case of some fields.
+
+    Returns
+    -------
+    dict
+        Extracted references, keyed by extractor name.
+    dict
+        The index of the original reference behind each extracted reference,
+        keyed by ``id()`` of the extracted reference.
+    """
+    rng = random.Random(seed)
+    vocabulary = [_word(rng) for _ in range(20000)]
+    truth = []
+    for i in range(N):
+        title = ' '.join(
+            vocabulary[min(int(rng.paretovariate(1.0)) - 1,
+                           len(vocabulary) - 1)]
+            for _ in range(rng.randint(4, 12))
+        )
+        source = rng.choice(SOURCES)
+        truth.append(dict(
+            title=title,
+            authors=[{'givennames': rng.choice(string.ascii_uppercase),
+                      'surname': _word(rng).title()}
+                     for _ in range(rng.randint(1, 4))],
+            source=source,
+            year=str(rng.randint(1950, 2018)),
+            volume=str(rng.randint(1, 900)),
+            pages=str(rng.randint(1, 9999)),
+            raw='%s, %s, %i' % (title, source, i)
+        ))
+
+    records: Dict[str, List[Reference]] = {}
+    origin: Dict[int, int] = {}
+    for extractor in string.ascii_lowercase[:extractors]:
+        records[extractor] = []
+        for i, data in enumerate(truth):
+            if rng.random() < drop:
+                continue
+            data = dict(data)
+            if rng.random() < 0.5:
+                data['title'] = data['title'].upper()
+            if rng.random() < 0.3:
+                data['pages'] = ''
+            if rng.random() < 0.3:
+                data['raw'] = ''
+            reference = Reference(**data)
+            origin[id(reference)] = i
+            records[extractor].append(reference)
+    return records, origin
@@ -269,6 +269,46 @@ KINESIS_START_TYPE = os.environ.get('KINESIS_START_TYPE', 'AT_TIMESTAMP')
 NOW = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
 KINESIS_START_AT = os.environ.get('KINESIS_START_AT', NOW)
 
+ALIGNMENT_STRATEGY = os.environ.get('REFERENCES_ALIGNMENT_STRATEGY', 'greedy')
+"""
+Strategy used to align references across extractions: ``greedy``, ``banded``
+(order-aware), or ``global`` (optimal assignment). See
+:mod:`references.process.merge.align`.
+"""
+
+ALIGNMENT_BLOCKING_THRESHOLD = int(
+    os.environ.get('REFERENCES_ALIGNMENT_BLOCKING_THRESHOLD', '2000')
+)
+"""
+Number of references in an extraction at which alignment compares only the
+candidate pairs found by locality-sensitive hashing, rather than all pairs.
+"""
+
+ALIGNMENT_CUTOFF_RESOLUTION: Optional[float] = float(
+    os.environ['REFERENCES_ALIGNMENT_CUTOFF_RESOLUTION']
+) if os.environ.get('REFERENCES_ALIGNMENT_CUTOFF_RESOLUTION') else None
+"""
+Resolution (e.g. ``0.001``) to which similarity scores are rounded when the
+alignment cutoff is calculated, which bounds the memory and time taken to
+calculate it for very large documents. If not set, the cutoff is exact.
+"""
+
+ARBITRATION_PROCESSES = int(
+    os.environ.get('REFERENCES_ARBITRATION_PROCESSES', '1')
+)
+"""
+Number of processes used to arbitrate the aligned references of a large
+document. If 1, arbitration is done in the merge process.
+"""
+
+ARBITRATION_PARALLEL_THRESHOLD = int(
+    os.environ.get('REFERENCES_ARBITRATION_PARALLEL_THRESHOLD', '5000')
+)
+"""
+Number of aligned references at which arbitration uses
+``ARBITRATION_PROCESSES`` processes, rather than just the merge process.
+"""
+
 # This is where extracted references should be stored.
 REFERENCES_REDIS_HOST = os.environ.get('REDIS_MASTER_SERVICE_HOST', 'localhost')
 REFERENCES_REDIS_PORT = os.environ.get('REDIS_MASTER_SERVICE_PORT', '6379')
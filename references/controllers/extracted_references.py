@@ -9,7 +9,6 @@ from werkzeug.exceptions import NotFound, InternalServerError, BadRequest
 from arxiv import status
 from arxiv.base import logging
 from references.services import data_store
-from references.domain import ReferenceSet
 
 logger = logging.getLogger(__name__)
 
@@ -118,19 +117,14 @@ def get(document_id: str, ref_id: str) -> ControllerResponse:
         Response headers.
     """
     try:
-        rset: ReferenceSet = data_store.load(document_id)
+        # Only the requested reference is loaded, not the whole set.
+        reference = data_store.load_reference(document_id, ref_id)
     except data_store.CommunicationError as e:
         logger.error("Couldn't connect to data store")
         raise InternalServerError({'reason': "Couldn't connect to data store"})
     except data_store.ReferencesNotFound as e:
-        logger.error("Couldn't connect to data store")
-        raise NotFound({'reason': "No such reference"})
-
-    try:
-        reference = [r for r in rset.references if r.identifier == ref_id][0]
-    except IndexError:
         logger.error("No such reference: %s", ref_id)
-        raise NotFound({'reason': 'No such reference'})
+        raise NotFound({'reason': "No such reference"})
     return reference.to_dict(), status.HTTP_200_OK, {}
 
 
@@ -136,28 +136,28 @@ class TestReferenceMetadataControllerGet(TestCase):
     """Test the :func:`.reference.get` function."""
 
     @mock.patch.object(data_store, 'load')
-    def test_get_calls_datastore_session(self, retrieve_mock):
+    @mock.patch.object(data_store, 'load_reference')
+    def test_get_calls_datastore_session(self, retrieve_mock, load_mock):
         """Test :func:`.reference.get` function."""
         ref = Reference(raw='asdf')
-        retrieve_mock.return_value = ReferenceSet(
-            document_id='fooid123',
-            references=[ref],
-            version='0.1',
-            score=0.9,
-            created=datetime.now(),
-            updated=datetime.now()
-        )
-        extracted_references.get('arxiv:1234.5678', ref.identifier)
+        retrieve_mock.return_value = ref
+        response, code, _ = extracted_references.get('arxiv:1234.5678',
+                                                     ref.identifier)
         self.assertEqual(retrieve_mock.call_count, 1)
+        retrieve_mock.assert_called_with('arxiv:1234.5678', ref.identifier)
+        self.assertEqual(load_mock.call_count, 0,
+                         'The whole reference set should not be loaded')
+        self.assertEqual(response, ref.to_dict())
+        self.assertEqual(code, status.HTTP_200_OK)
 
-    @mock.patch.object(data_store, 'load')
+    @mock.patch.object(data_store, 'load_reference')
     def test_get_handles_IOError(self, retrieve_mock):
         """The underlying datastore cannot communicate."""
         retrieve_mock.side_effect = data_store.CommunicationError
         with self.assertRaises(InternalServerError):
             extracted_references.get('arxiv:1234.5678', 'asdf')
 
-    @mock.patch.object(data_store, 'load')
+    @mock.patch.object(data_store, 'load_reference')
     def test_get_handles_nonexistant_record(self, retrieve_mock):
         """A non-existant record is requested."""
         retrieve_mock.side_effect = data_store.ReferencesNotFound
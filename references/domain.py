@@ -1,67 +1,228 @@
-"""Core data structures in the references application."""
+"""
+Core data structures in the references application.
 
-from typing import List, Optional
+:class:`.Author`, :class:`.Identifier` and :class:`.Reference` are created in
+large numbers (every extractor, for every document), so they keep their
+fields in ``__slots__`` rather than in an instance ``__dict__``. Their
+``repr`` and equality are those of the dataclasses that they replace; in
+particular, :func:`references.process.merge.align.digest` depends on the
+``repr`` of a :class:`.Reference`.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type
 from datetime import datetime
 from base64 import b64encode
-from dataclasses import dataclass, field, asdict
-from unidecode import unidecode
+from dataclasses import dataclass, field
 
+from references.process.textutil import to_ascii
 
-@dataclass
-class Author:
+
+def _plain(value: Any) -> Any:
+    """Convert ``value`` to plain ``dict``, ``list`` and scalar values."""
+    if isinstance(value, _Record):
+        return _asdict(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def _asdict(record: '_Record') -> dict:
+    """Equivalent of :func:`dataclasses.asdict`, but only copies containers."""
+    return {name: _plain(getattr(record, name)) for name in record.FIELDS}
+
+
+class _Record(object):
+    """A fixed set of fields, in the style of a dataclass."""
+
+    __slots__: Tuple[str, ...] = ()
+    FIELDS: Tuple[str, ...] = ()
+    """Names of the fields, in order."""
+
+    def __repr__(self) -> str:
+        """Represent the record as a dataclass would."""
+        return '%s(%s)' % (type(self).__qualname__, ', '.join(
+            '%s=%r' % (name, getattr(self, name)) for name in self.FIELDS
+        ))
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the fields of two records of the same class."""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.FIELDS)
+
+    # Mutable, so not hashable (like a dataclass with ``eq=True``).
+    __hash__ = None     # type: ignore
+
+    def to_dict(self) -> dict:
+        """Return a dict representation of this object."""
+        return _asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Any:
+        """Create an instance from the output of :meth:`.to_dict`."""
+        return cls(**data)
+
+
+class Author(_Record):
     """A parsed author name in a bibliographic reference."""
 
-    surname: str = field(default_factory=str)
-    givennames: str = field(default_factory=str)
-    prefix: str = field(default_factory=str)
-    suffix: str = field(default_factory=str)
-    fullname: str = field(default_factory=str)
+    __slots__ = FIELDS = ('surname', 'givennames', 'prefix', 'suffix',
+                          'fullname')
 
+    surname: str
+    givennames: str
+    prefix: str
+    suffix: str
+    fullname: str
 
-@dataclass
-class Identifier:
+    def __init__(self, surname: str = '', givennames: str = '',
+                 prefix: str = '', suffix: str = '',
+                 fullname: str = '') -> None:
+        """Set the parts of the name."""
+        self.surname = surname
+        self.givennames = givennames
+        self.prefix = prefix
+        self.suffix = suffix
+        self.fullname = fullname
+
+
+class Identifier(_Record):
     """A persistent identifier for a cited reference."""
 
-    identifer_type: str
+    __slots__ = FIELDS = ('identifier_type', 'identifier')
+
+    identifier_type: str
     """E.g. ISBN, ISSN, URI."""
     identifier: str
 
+    def __init__(self, identifier_type: str, identifier: str) -> None:
+        """Set the type and value of the identifier."""
+        self.identifier_type = identifier_type
+        self.identifier = identifier
 
-@dataclass
-class Reference:
+
+class Reference(_Record):
     """An instance of a parsed bibliographic reference."""
 
-    title: Optional[str] = field(default=None)
+    FIELDS = ('title', 'raw', 'arxiv_id', 'authors', 'reftype', 'doi',
+              'volume', 'issue', 'pages', 'source', 'year', 'identifiers',
+              'identifier', 'score')
+    __slots__ = tuple(name for name in FIELDS if name != 'identifier') \
+        + ('_identifier', '_identifier_raw')
+
+    title: Optional[str]
     """The title of the reference."""
-    raw: str = field(default_factory=str)
+    raw: str
     """The un-parsed reference string."""
-    arxiv_id: Optional[str] = field(default=None)
+    arxiv_id: Optional[str]
     """arXiv paper ID."""
-    authors: List[Author] = field(default_factory=list)
-    reftype: str = field(default='article')
+    authors: List[Author]
+    reftype: str
     """The type of work to which the reference refers."""
-    doi: Optional[str] = field(default=None)
-    volume: Optional[str] = field(default=None)
-    issue: Optional[str] = field(default=None)
-    pages: Optional[str] = field(default=None)
-    source: Optional[str] = field(default=None)
+    doi: Optional[str]
+    volume: Optional[str]
+    issue: Optional[str]
+    pages: Optional[str]
+    source: Optional[str]
     """Journal, conference, etc."""
-    year: Optional[str] = field(default=None)
-    identifiers: List[Identifier] = field(default_factory=list)
+    year: Optional[str]
+    identifiers: List[Identifier]
 
-    identifier: str = field(default_factory=str)
+    identifier: str
     """Unique identifier for this extracted reference."""
 
-    score: float = field(default=0.)
+    score: float
+
+    def __init__(self, title: Optional[str] = None, raw: str = '',
+                 arxiv_id: Optional[str] = None,
+                 authors: Optional[List[Author]] = None,
+                 reftype: str = 'article', doi: Optional[str] = None,
+                 volume: Optional[str] = None, issue: Optional[str] = None,
+                 pages: Optional[str] = None, source: Optional[str] = None,
+                 year: Optional[str] = None,
+                 identifiers: Optional[List[Identifier]] = None,
+                 identifier: str = '', score: float = 0.) -> None:
+        """
+        Set the fields of the reference.
+
+        ``identifier`` is ignored: the identifier is always based on ``raw``
+        (as it is when the reference is created). It is only worked out when
+        it is first used, since most references (e.g. those made while
+        extracting identifiers or merging) never need it.
+        """
+        self.title = title
+        self.raw = raw
+        self.arxiv_id = arxiv_id
+        self.authors = authors if authors is not None else []
+        self.reftype = reftype
+        self.doi = doi
+        self.volume = volume
+        self.issue = issue
+        self.pages = pages
+        self.source = source
+        self.year = year
+        self.identifiers = identifiers if identifiers is not None else []
+        self.score = score
+        self._identifier: Optional[str] = None
+        self._identifier_raw = raw
 
-    def __post_init__(self) -> None:
-        """Set the identifier based on reference content."""
-        hash_string = bytes(unidecode(self.raw), encoding='ascii')
-        self.identifier = str(b64encode(hash_string), encoding='utf-8')[:100]
+    @property   # type: ignore
+    def identifier(self) -> str:
+        """Unique identifier for this extracted reference."""
+        if self._identifier is None:
+            self._identifier = _identify(self._identifier_raw)
+        return self._identifier
+
+    @identifier.setter
+    def identifier(self, identifier: str) -> None:
+        self._identifier = identifier
 
     def to_dict(self) -> dict:
         """Return a dict representation of this object."""
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        return {k: v for k, v in _asdict(self).items() if v is not None}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Reference':
+        """
+        Create a reference from the output of :meth:`.to_dict`.
+
+        The stored ``identifier`` (if any) is used as it is. Authors and
+        identifiers that were stored from an :class:`.Author` or
+        :class:`.Identifier` (i.e. that have all of its fields) become one
+        again; others (e.g. the ``dict`` authors made by some extractors) are
+        kept as they were stored.
+        """
+        data = dict(data)
+        for key, kind in [('authors', Author), ('identifiers', Identifier)]:
+            if data.get(key):
+                data[key] = [_restore(kind, item) for item in data[key]]
+        identifier = data.pop('identifier', None)
+        reference = cls(**data)
+        if identifier is not None:
+            reference.identifier = identifier
+        return reference
+
+
+def _identify(raw: str) -> str:
+    """Generate the identifier of a reference from its raw string."""
+    hash_string = bytes(to_ascii(raw), encoding='ascii')
+    return str(b64encode(hash_string), encoding='utf-8')[:100]
+
+
+def _restore(kind: Type[_Record], item: Any) -> Any:
+    """Make ``item`` a ``kind`` again, if it was one when stored."""
+    if isinstance(item, dict) and item.keys() == set(kind.FIELDS):
+        return kind(**item)
+    return item
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse the output of :meth:`datetime.isoformat` (without a timezone)."""
+    fmt = '%Y-%m-%dT%H:%M:%S.%f' if '.' in value else '%Y-%m-%dT%H:%M:%S'
+    return datetime.strptime(value, fmt)
 
 
 @dataclass
@@ -91,7 +252,220 @@ class ReferenceSet:
 
     def to_dict(self) -> dict:
         """Generate a dict representation of this object."""
-        data: dict = asdict(self)
-        data['created'] = self.created.isoformat()
-        data['updated'] = self.updated.isoformat()
+        return {
+            'document_id': self.document_id,
+            # Unlike :meth:`.Reference.to_dict`, empty fields are included.
+            'references': [_asdict(reference)
+                           for reference in self.references],
+            'version': self.version,
+            'score': self.score,
+            'created': self.created.isoformat(),
+            'updated': self.updated.isoformat(),
+            'extractor': self.extractor,
+            'extractors': list(self.extractors),
+            'raw': self.raw
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ReferenceSet':
+        """Create a reference set from the output of :meth:`.to_dict`."""
+        data = dict(data)
+        data['references'] = [Reference.from_dict(reference)
+                              for reference in data['references']]
+        data['created'] = _parse_datetime(data['created'])
+        data['updated'] = _parse_datetime(data['updated'])
+        return cls(**data)
+
+
+REFERENCE_COLUMNS = tuple(name for name in Reference.FIELDS
+                          if name not in ('authors', 'identifiers'))
+"""Fields of :class:`.Reference` that are stored as a single column."""
+
+
+@dataclass
+class ColumnarReferenceSet:
+    """
+    A :class:`.ReferenceSet`, with one array for each field of the references.
+
+    Authors and identifiers are kept in flat tables: the authors of reference
+    ``i`` are ``authors[author_offsets[i]:author_offsets[i + 1]]``. Equal
+    strings in the columns share a single object, since values such as
+    journal names and years repeat a lot.
+
+    Use :meth:`.from_reference_set` and :meth:`.to_reference_set` to convert
+    to and from a :class:`.ReferenceSet`; nothing is lost either way.
+    """
+
+    document_id: str
+    version: str
+    score: float
+    created: datetime
+    updated: datetime
+    extractor: str = 'combined'
+    extractors: List[str] = field(default_factory=list)
+    raw: bool = field(default=False)
+    columns: Dict[str, list] = field(
+        default_factory=lambda: {name: [] for name in REFERENCE_COLUMNS}
+    )
+    """Values of each of :const:`.REFERENCE_COLUMNS`, by reference."""
+    authors: list = field(default_factory=list)
+    author_offsets: List[int] = field(default_factory=lambda: [0])
+    identifiers: list = field(default_factory=list)
+    identifier_offsets: List[int] = field(default_factory=lambda: [0])
+    strings: Dict[str, str] = field(default_factory=dict, repr=False,
+                                    compare=False)
+    """Each distinct string in :attr:`columns`, keyed by itself."""
+
+    def __len__(self) -> int:
+        """Get the number of references."""
+        return len(self.author_offsets) - 1
+
+    def column(self, name: str) -> list:
+        """Get the values of field ``name`` of each reference."""
+        if name == 'authors':
+            return [self.authors_of(i) for i in range(len(self))]
+        if name == 'identifiers':
+            return [self.identifiers_of(i) for i in range(len(self))]
+        return self.columns[name]
+
+    def authors_of(self, i: int) -> list:
+        """Get the authors of reference ``i``."""
+        return self.authors[self.author_offsets[i]:self.author_offsets[i + 1]]
+
+    def identifiers_of(self, i: int) -> list:
+        """Get the identifiers of reference ``i``."""
+        return self.identifiers[
+            self.identifier_offsets[i]:self.identifier_offsets[i + 1]
+        ]
+
+    def reference(self, i: int) -> Reference:
+        """Make reference ``i``."""
+        reference = Reference(
+            authors=self.authors_of(i), identifiers=self.identifiers_of(i),
+            **{name: self.columns[name][i] for name in REFERENCE_COLUMNS
+               if name != 'identifier'}
+        )
+        identifier = self.columns['identifier'][i]
+        if identifier is not None:
+            reference.identifier = identifier
+        return reference
+
+    def reference_dict(self, i: int) -> dict:
+        """
+        Get the output of :meth:`.Reference.to_dict` for reference ``i``.
+
+        This is the same as ``self.reference(i).to_dict()``, but the
+        :class:`.Reference` is not made.
+        """
+        nested = {'authors': self.authors_of(i),
+                  'identifiers': self.identifiers_of(i)}
+        data = {name: _plain(nested[name]) if name in nested
+                else self.columns[name][i] for name in Reference.FIELDS}
+        if data['identifier'] is None:
+            data['identifier'] = _identify(data['raw'])
+        return {name: value for name, value in data.items()
+                if value is not None}
+
+    def references(self) -> List[Reference]:
+        """Make all of the references."""
+        return [self.reference(i) for i in range(len(self))]
+
+    def append(self, reference: Any) -> None:
+        """
+        Add a reference at the end.
+
+        ``reference`` is a :class:`.Reference`, or a ``dict`` such as the
+        output of :meth:`.Reference.to_dict`.
+        """
+        if isinstance(reference, Reference):
+            values = {name: getattr(reference, name)
+                      for name in Reference.FIELDS}
+        else:
+            values = {name: reference.get(name, _DEFAULTS.get(name))
+                      for name in Reference.FIELDS}
+            values['authors'] = [_restore(Author, author)
+                                 for author in values['authors']]
+            values['identifiers'] = [_restore(Identifier, identifier)
+                                     for identifier in values['identifiers']]
+        strings = self.strings
+        for name in REFERENCE_COLUMNS:
+            value = values[name]
+            if isinstance(value, str):
+                value = strings.setdefault(value, value)
+            self.columns[name].append(value)
+        self.authors.extend(values['authors'])
+        self.author_offsets.append(len(self.authors))
+        self.identifiers.extend(values['identifiers'])
+        self.identifier_offsets.append(len(self.identifiers))
+
+    @classmethod
+    def from_reference_set(cls, reference_set: ReferenceSet) \
+            -> 'ColumnarReferenceSet':
+        """Make the columns of a :class:`.ReferenceSet`."""
+        columnar = cls(**{name: getattr(reference_set, name)
+                          for name in _SET_FIELDS})
+        for reference in reference_set.references:
+            columnar.append(reference)
+        return columnar
+
+    def to_reference_set(self) -> ReferenceSet:
+        """Make a :class:`.ReferenceSet`, with all of its references."""
+        return ReferenceSet(references=self.references(),
+                            **{name: getattr(self, name)
+                               for name in _SET_FIELDS})
+
+    def to_dict(self) -> dict:
+        """Generate a dict representation of this object."""
+        data = {name: getattr(self, name) for name in _SET_FIELDS}
+        data.update({
+            'created': self.created.isoformat(),
+            'updated': self.updated.isoformat(),
+            'extractors': list(self.extractors),
+            'columns': {name: list(values)
+                        for name, values in self.columns.items()},
+            'authors': _plain(self.authors),
+            'author_offsets': list(self.author_offsets),
+            'identifiers': _plain(self.identifiers),
+            'identifier_offsets': list(self.identifier_offsets)
+        })
         return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ColumnarReferenceSet':
+        """
+        Create columns from the output of :meth:`.to_dict`.
+
+        The output of :meth:`.ReferenceSet.to_dict` can also be read, without
+        making each :class:`.Reference` first.
+        """
+        metadata = {name: data[name] for name in _SET_FIELDS if name in data}
+        metadata['created'] = _parse_datetime(data['created'])
+        metadata['updated'] = _parse_datetime(data['updated'])
+        columnar = cls(**metadata)
+        if 'columns' not in data:
+            for reference in data['references']:
+                columnar.append(reference)
+            return columnar
+
+        strings = columnar.strings
+        columnar.columns = {
+            name: [strings.setdefault(value, value)
+                   if isinstance(value, str) else value for value in values]
+            for name, values in data['columns'].items()
+        }
+        columnar.authors = [_restore(Author, author)
+                            for author in data['authors']]
+        columnar.author_offsets = list(data['author_offsets'])
+        columnar.identifiers = [_restore(Identifier, identifier)
+                                for identifier in data['identifiers']]
+        columnar.identifier_offsets = list(data['identifier_offsets'])
+        return columnar
+
+
+_SET_FIELDS = ('document_id', 'version', 'score', 'created', 'updated',
+               'extractor', 'extractors', 'raw')
+"""Fields of a :class:`.ReferenceSet` other than its references."""
+
+_DEFAULTS = {name: getattr(Reference(), name)
+             for name in Reference.FIELDS if name != 'identifier'}
+"""Default values of the fields of a :class:`.Reference`."""
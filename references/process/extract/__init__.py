@@ -5,10 +5,14 @@ Leverages third-party reference extraction services to generate a set of raw
 bibliographic metadata.
 """
 
-from typing import Dict, List, Callable, Tuple
+from contextlib import contextmanager
+from typing import Dict, List, Callable, Tuple, Optional, Iterator
 from datetime import datetime
+from queue import Queue
 from statistics import mean
+from threading import Thread
 
+from flask import Flask, current_app
 from arxiv.base import logging
 
 from references.services import cermine, grobid, refextract, scienceparse
@@ -23,6 +27,9 @@ EXTRACTORS: List[Tuple[str, Callable]] = [
     ('scienceparse', scienceparse.extract_references),
 ]
 
+Callback = Callable[[str, List[Reference]], None]
+"""Called with the name of an extractor, and the references it extracted."""
+
 
 def getDefaultExtractors() -> List[Tuple[str, Callable]]:
     """Get the default extractors for this service."""
@@ -48,8 +55,36 @@ def estimate_quality(metadata: list) -> float:
     ])
 
 
+@contextmanager
+def _app_context(app: Optional[Flask]) -> Iterator[None]:
+    """Use the configuration and services of ``app`` (if any) in a thread."""
+    if app is None:
+        yield
+        return
+    with app.app_context():
+        yield
+
+
+def _consume(extracted: Queue, callback: Callback, errors: List[Exception],
+             app: Optional[Flask]) -> None:
+    """Pass each extraction on ``extracted`` to ``callback``, until None."""
+    with _app_context(app):
+        while True:
+            extraction = extracted.get()
+            if extraction is None:
+                return
+            name, references = extraction
+            try:
+                callback(name, references)
+            except Exception as e:
+                logger.error('callback failed for extraction with %s: %s',
+                             name, e)
+                errors.append(e)
+
+
 def extract(pdf_path: str, document_id: str,
-            extractors: list = getDefaultExtractors()) \
+            extractors: list = getDefaultExtractors(),
+            callback: Optional[Callback] = None) \
         -> Dict[str, List[Reference]]:
     """
     Perform reference extractions using all available extractors.
@@ -62,20 +97,51 @@ def extract(pdf_path: str, document_id: str,
         Identifier for an arXiv paper.
     extractors : list
         Tuples of ('extractor name', callable).
+    callback : callable
+        If provided, called with the extractor name and references of each
+        successful extraction, in the order of ``extractors``; e.g.
+        :meth:`references.process.merge.IncrementalMerge.add_extraction`. It
+        is called in a separate thread, so that it runs while the next
+        extractors do.
 
     Returns
     -------
     dict
         Keys are extractor names, values are lists of reference metadata
         objects (``dict``).
+
+    Raises
+    ------
+    Exception
+        If ``callback`` raised an exception. It is raised once every
+        extractor has run; a failed extractor is skipped, and is not an error.
     """
     extractions = {}
-    for name, extractor in extractors:
-        logger.debug('%s: starting extraction with %s', document_id, name)
-        try:
-            extractions[name] = extractor(pdf_path, document_id)
-            logger.debug('%s: extraction with %s succeeded', document_id, name)
-        except Exception as e:
-            logger.debug('%s: extraction failed for %s with %s: %s',
-                         document_id, pdf_path, name, e)
+    extracted: Queue = Queue()
+    errors: List[Exception] = []
+    consumer: Optional[Thread] = None
+    if callback is not None:
+        app = current_app._get_current_object() if current_app else None
+        consumer = Thread(target=_consume,
+                          args=(extracted, callback, errors, app))
+        consumer.start()
+    try:
+        for name, extractor in extractors:
+            logger.debug('%s: starting extraction with %s', document_id, name)
+            try:
+                extractions[name] = extractor(pdf_path, document_id)
+                logger.debug('%s: extraction with %s succeeded', document_id,
+                             name)
+            except Exception as e:
+                logger.debug('%s: extraction failed for %s with %s: %s',
+                             document_id, pdf_path, name, e)
+                continue
+            if consumer is not None:
+                extracted.put((name, extractions[name]))
+    finally:
+        if consumer is not None:
+            extracted.put(None)
+            consumer.join()
+    if errors:
+        raise errors[0]
     return extractions
@@ -0,0 +1,78 @@
+"""Tests for :func:`references.process.extract.extract`."""
+
+import threading
+import unittest
+
+from flask import Flask, current_app
+
+from references.domain import Reference
+from references.process.extract import extract
+
+
+def _extractor(*references: Reference):
+    def _extract(pdf_path: str, document_id: str) -> list:
+        return list(references)
+    return _extract
+
+
+def _failed(pdf_path: str, document_id: str) -> list:
+    raise IOError('nope')
+
+
+class TestExtractCallback(unittest.TestCase):
+    """Extractions are passed to a callback as they become available."""
+
+    def test_order(self):
+        """The callback gets each successful extraction, in order."""
+        called = []
+        extractions = extract('foo.pdf', '1234.5678', [
+            ('cermine', _extractor(Reference(raw='a'))),
+            ('grobid', _failed),
+            ('refextract', _extractor(Reference(raw='b'))),
+        ], callback=lambda name, references: called.append(name))
+        self.assertEqual(called, ['cermine', 'refextract'])
+        self.assertEqual(list(extractions), ['cermine', 'refextract'])
+
+    def test_overlap(self):
+        """The callback runs while the next extractor does."""
+        started = threading.Event()
+        overlapped = []
+
+        def _next(pdf_path: str, document_id: str) -> list:
+            started.set()
+            return []
+
+        extract('foo.pdf', '1234.5678', [
+            ('cermine', _extractor(Reference(raw='a'))),
+            ('grobid', _next)
+        ], callback=lambda name, refs: overlapped.append(started.wait(1)))
+        self.assertEqual(overlapped, [True, True])
+
+    def test_callback_fails(self):
+        """An error in the callback is raised after every extractor runs."""
+        ran = []
+
+        def _callback(name: str, references: list) -> None:
+            raise RuntimeError('Alignment failed')
+
+        def _last(pdf_path: str, document_id: str) -> list:
+            ran.append(True)
+            return []
+
+        with self.assertRaises(RuntimeError):
+            extract('foo.pdf', '1234.5678', [
+                ('cermine', _extractor(Reference(raw='a'))),
+                ('grobid', _last)
+            ], callback=_callback)
+        self.assertEqual(ran, [True])
+
+    def test_app_context(self):
+        """The callback runs in the application context of the caller."""
+        apps = []
+        app = Flask('test')
+        with app.app_context():
+            extract('foo.pdf', '1234.5678', [
+                ('cermine', _extractor(Reference(raw='a')))
+            ], callback=lambda name, refs: apps.append(
+                current_app._get_current_object()))
+        self.assertEqual(apps, [app])
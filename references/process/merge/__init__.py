@@ -9,19 +9,37 @@ completeness and quality.
    :members:
 
 """
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional, Union
 
 from arxiv.base import logging
-from references.domain import Reference
+from references.domain import Reference, ColumnarReferenceSet
 from references.process.merge import align, arbitrate, priors, beliefs
 from references.process.merge.priors import EXTRACTORS
 from references.process.merge import normalize
+from references.process.textutil import NormalizationCache, \
+    normalization_scope
 
 logger = logging.getLogger(__name__)
 
+Extraction = Union[List[Reference], ColumnarReferenceSet]
+"""The references from a single extractor, as a list or as columns."""
 
-def merge_records(records: Dict[str, List[Reference]],
-                  extractor_priors: list = EXTRACTORS) \
+
+def _normalize(extraction: Extraction) -> List[Reference]:
+    """Normalize an extraction, and get its references."""
+    if isinstance(extraction, ColumnarReferenceSet):
+        return normalize.normalize_columns(extraction).references()
+    return normalize.normalize_records(extraction)
+
+
+def merge_records(records: Dict[str, Extraction],
+                  extractor_priors: list = EXTRACTORS,
+                  alignment: str = align.GREEDY,
+                  blocking_threshold: Optional[int] =
+                  align.BLOCKING_THRESHOLD,
+                  cutoff_resolution: Optional[float] = None,
+                  processes: int = 1,
+                  parallel_threshold: int = arbitrate.PARALLEL_THRESHOLD) \
         -> Tuple[List[Reference], float]:
     """
     Merge extracted references into a single authoritative set of references.
@@ -37,10 +55,25 @@ def merge_records(records: Dict[str, List[Reference]],
     ----------
     records : dict
         The reference records from multiple extraction servies/lookup services.
-        Keys are extractor names, values are lists of references (dict).
+        Keys are extractor names, values are lists of references (dict), or
+        a :class:`.ColumnarReferenceSet` (which is normalized as columns).
         E.g. ``{"cermine": [references], "grobid": [references]}``.
     extractor_priors : list
         Represents prior level of trust in field output for each extractor.
+    alignment : str
+        Alignment strategy; see :const:`.align.STRATEGIES`.
+    blocking_threshold : int
+        Number of references above which only candidate pairs are compared
+        during alignment; see :func:`.align.align_records`.
+    cutoff_resolution : float
+        Resolution of the similarity cutoff used in alignment (if None, it is
+        exact); see :func:`.align.align_records`.
+    processes : int
+        Number of processes used for arbitration; see
+        :func:`.arbitrate.arbitrate_all`.
+    parallel_threshold : int
+        Number of aligned references at which arbitration uses ``processes``
+        processes.
 
     Returns
     -------
@@ -49,13 +82,29 @@ def merge_records(records: Dict[str, List[Reference]],
         cite reference (``dict``).
     """
     N_extractions = len(records)
-    records = {extractor: normalize.normalize_records(extraction)
-               for extractor, extraction in records.items()}
-    try:
-        aligned_records = align.align_records(records)
-    except Exception as e:
-        raise RuntimeError('Alignment failed: %s' % e) from e
+    # Strings normalized while merging this document are not kept afterwards.
+    with normalization_scope():
+        normalized = {extractor: _normalize(extraction)
+                      for extractor, extraction in records.items()}
+        try:
+            aligned_records = align.align_records(
+                normalized,
+                strategy=alignment,
+                blocking_threshold=blocking_threshold,
+                cutoff_resolution=cutoff_resolution
+            )
+        except Exception as e:
+            raise RuntimeError('Alignment failed: %s' % e) from e
+        return _merge_aligned(aligned_records, extractor_priors,
+                              N_extractions, processes, parallel_threshold)
+
 
+def _merge_aligned(aligned_records: List[List[Tuple[str, Reference]]],
+                   extractor_priors: list, N_extractions: int,
+                   processes: int = 1,
+                   parallel_threshold: int = arbitrate.PARALLEL_THRESHOLD) \
+        -> Tuple[List[Reference], float]:
+    """Validate, arbitrate, and filter aligned references."""
     try:
         aligned_probabilities = beliefs.validate(aligned_records)
     except Exception as e:
@@ -65,7 +114,9 @@ def merge_records(records: Dict[str, List[Reference]],
         arbitrated_records = arbitrate.arbitrate_all(aligned_records,
                                                      aligned_probabilities,
                                                      extractor_priors,
-                                                     N_extractions)
+                                                     N_extractions,
+                                                     processes,
+                                                     parallel_threshold)
     except Exception as e:
         raise RuntimeError('Arbitration failed: %s' % e) from e
 
@@ -74,3 +125,90 @@ def merge_records(records: Dict[str, List[Reference]],
     except Exception as e:
         raise RuntimeError('Filtering failed: %s' % e) from e
     return final_records
+
+
+class IncrementalMerge(object):
+    """
+    Merges extractions as they become available.
+
+    Most of the work of aligning an extraction with the others is done as
+    soon as it is added (see :class:`.align.IncrementalAligner`), so that
+    it can overlap with extractors that are still running. A provisional set
+    of merged references can be produced at any time with :meth:`.merged`.
+    Strings are normalized with a cache of the merge's own, :attr:`.cache`,
+    whichever thread adds an extraction.
+
+    Parameters
+    ----------
+    extractor_priors : list
+        Represents prior level of trust in field output for each extractor.
+    alignment : str
+        Alignment strategy; see :const:`.align.STRATEGIES`.
+    blocking_threshold : int
+        See :func:`.align.align_records`.
+    cutoff_resolution : float
+        See :func:`.align.align_records`.
+    processes : int
+        See :func:`.arbitrate.arbitrate_all`.
+    parallel_threshold : int
+        See :func:`.arbitrate.arbitrate_all`.
+    """
+
+    def __init__(self, extractor_priors: list = EXTRACTORS,
+                 alignment: str = align.GREEDY,
+                 blocking_threshold: Optional[int] =
+                 align.BLOCKING_THRESHOLD,
+                 cutoff_resolution: Optional[float] = None,
+                 processes: int = 1,
+                 parallel_threshold: int = arbitrate.PARALLEL_THRESHOLD) \
+            -> None:
+        """Set up an empty merge."""
+        self.extractor_priors = extractor_priors
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self.aligner = align.IncrementalAligner(alignment, blocking_threshold,
+                                                cutoff_resolution)
+        self.cache = NormalizationCache()
+
+    def __len__(self) -> int:
+        """Number of extractions added so far."""
+        return len(self.aligner)
+
+    def add_extraction(self, extractor: str,
+                       references: Extraction) -> None:
+        """
+        Add the references from a single extractor.
+
+        Parameters
+        ----------
+        extractor : str
+            Name of the extractor.
+        references : list or :class:`.ColumnarReferenceSet`
+            References extracted by ``extractor``.
+        """
+        with normalization_scope(cache=self.cache):
+            normalized = _normalize(references)
+            try:
+                self.aligner.add_extraction(extractor, normalized)
+            except Exception as e:
+                raise RuntimeError('Alignment failed: %s' % e) from e
+
+    def merged(self) -> Tuple[List[Reference], float]:
+        """
+        Merge the extractions added so far.
+
+        Returns
+        -------
+        list
+            Authoritative reference metadata (see :func:`.merge_records`).
+        float
+            Composite score for the retained references.
+        """
+        with normalization_scope(cache=self.cache):
+            try:
+                aligned_records = self.aligner.aligned()
+            except Exception as e:
+                raise RuntimeError('Alignment failed: %s' % e) from e
+            return _merge_aligned(aligned_records, self.extractor_priors,
+                                  len(self), self.processes,
+                                  self.parallel_threshold)
@@ -1,21 +1,42 @@
 """Generate authoritative reference metadata using validity probabilities."""
 
-from collections import Counter, defaultdict
+import atexit
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+import os
 from statistics import mean
-from itertools import repeat
 import re
+import threading
 
-from typing import Tuple, Any, Union, Callable, List, Dict
+from typing import Tuple, Any, Union, Callable, List, Dict, Hashable, \
+    Iterable, Iterator, Optional
 
+import billiard        # Process pools in (daemonic) Celery workers.
 import editdistance    # For string similarity.
 
-from references.domain import Reference
+from references.domain import Reference, Author, Identifier
 from references.util import argmax
 from arxiv.base import logging
 from references.process.merge.align import align_records
 
 logger = logging.getLogger(__name__)
 
+AuthorKey = Tuple[str, str]
+"""Normalized surname and initials of an author."""
+
+NAME_FIELDS = ('surname', 'givennames', 'fullname')
+NON_NAME = re.compile(r'[\W\d_]+')
+
+PARALLEL_THRESHOLD = 5000
+"""Default number of aligned references at which arbitration is parallel."""
+
+CHUNKS_PER_PROCESS = 4
+"""Number of chunks of aligned references per worker process."""
+
+BATCH_FIELDS = ['title', 'source', 'raw', 'volume']
+"""String fields compared in a batch for each document; see :func:`._batch`."""
+
 
 def _dict_repr(value: dict) -> str:
     """
@@ -54,6 +75,147 @@ def _validate(extractors: list, priors: dict, metadata: dict,
         raise ValueError(msg) from e
 
 
+class SimilarityCache(object):
+    """
+    Bounded, least-recently-used cache of similarity scores.
+
+    The same pairs of values (journal names, years, etc) turn up again and
+    again, both within and across documents, so scores are kept for the most
+    recently used ``maxsize`` pairs. The cache may be used from more than one
+    thread; scores are calculated outside of its lock.
+    """
+
+    def __init__(self, maxsize: int = 100000) -> None:
+        """Set up an empty cache."""
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._scores: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of cached scores."""
+        return len(self._scores)
+
+    def get(self, key: Hashable, calculate: Callable[[], float]) -> float:
+        """Get the score for ``key``, calculating it if it is not cached."""
+        with self._lock:
+            if key in self._scores:
+                self.hits += 1
+                self._scores.move_to_end(key)
+                cached: float = self._scores[key]
+                return cached
+        score = calculate()
+        with self._lock:
+            self.misses += 1
+            self._scores[key] = score
+            if len(self._scores) > self.maxsize:
+                self._scores.popitem(last=False)
+        return score
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self) -> Dict[str, float]:
+        """Get the hits, misses, hit rate, and current size of the cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate, 'size': len(self),
+                'maxsize': self.maxsize}
+
+    def clear(self) -> None:
+        """Remove all cached scores, and reset the statistics."""
+        with self._lock:
+            self._scores.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @contextmanager
+    def disabled(self) -> Iterator[None]:
+        """Calculate every score afresh within this context."""
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+
+SIMILARITY_CACHE = SimilarityCache()
+"""Scores of the field similarity functions; see :func:`._cached`."""
+
+
+class _FrozenList(tuple):
+    """Immutable encoding of a ``list``."""
+
+
+class _FrozenDict(tuple):
+    """Immutable encoding of a ``dict``, as ``(key, value)`` pairs by key."""
+
+    def keys(self) -> List[Any]:
+        """Get the keys of the encoded ``dict``."""
+        return [key for key, _ in self]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get the value for ``key`` in the encoded ``dict``."""
+        for _key, value in self:
+            if _key == key:
+                return value
+        return default
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Encode a field value in a canonical, hashable form.
+
+    Lists become :class:`._FrozenList`, and dicts (and domain objects, such as
+    :class:`.Author`) become :class:`._FrozenDict`, all the way down. Equal
+    values have equal encodings. Use :func:`._thaw` to decode.
+
+    Raises
+    ------
+    TypeError
+        If ``value`` is of a type that has no canonical form.
+    """
+    if value is None or isinstance(value, (str, int, float, _FrozenList,
+                                           _FrozenDict)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return _FrozenList(map(_freeze, value))
+    if isinstance(value, dict):
+        return _FrozenDict(sorted((key, _freeze(item))
+                                  for key, item in value.items()))
+    if isinstance(value, (Author, Identifier)):
+        return _FrozenDict(sorted((key, _freeze(getattr(value, key)))
+                                  for key in value.FIELDS))
+    raise TypeError('No canonical form for %s' % type(value))
+
+
+def _thaw(value: Any) -> Any:
+    """Decode a value encoded by :func:`._freeze`."""
+    if isinstance(value, _FrozenList):
+        return [_thaw(item) for item in value]
+    if isinstance(value, _FrozenDict):
+        return {key: _thaw(item) for key, item in value}
+    return value
+
+
+def _cached(func: Callable[[Any, Any], float]) -> Callable[[Any, Any], float]:
+    """Cache the scores of a similarity function in the similarity cache."""
+    @wraps(func)
+    def _similarity_cached(value_a: Any, value_b: Any) -> float:
+        if not SIMILARITY_CACHE.enabled:
+            return func(value_a, value_b)
+        try:
+            key = (func.__name__, _freeze(value_a), _freeze(value_b))
+        except TypeError:
+            return func(value_a, value_b)
+        return SIMILARITY_CACHE.get(key, lambda: func(value_a, value_b))
+    return _similarity_cached
+
+
 def _similarity_int_float(value_a: Union[float, int],
                           value_b: Union[float, int]) -> float:
     """Relative similarity of two numeric values."""
@@ -63,16 +225,104 @@ def _similarity_int_float(value_a: Union[float, int],
     return 1. - max(diff, -1. * diff)/mean([value_a, value_b])
 
 
+def _strip_common(value_a: str, value_b: str) -> Tuple[str, str]:
+    """Remove the common prefix and suffix, which do not add to the distance."""
+    start = len(os.path.commonprefix([value_a, value_b]))
+    value_a, value_b = value_a[start:], value_b[start:]
+    end = len(os.path.commonprefix([value_a[::-1], value_b[::-1]]))
+    return value_a[:len(value_a) - end], value_b[:len(value_b) - end]
+
+
+@_cached
 def _similarity_str(value_a: str, value_b: str) -> float:
     """Relative similarity of two strings, based on edit distance."""
     N_max = max(len(value_a), len(value_b))
     if N_max == 0:
         return 0.
-    sim: float = (N_max - editdistance.eval(value_a, value_b))/N_max
+    sim: float = (N_max - editdistance.eval(*_strip_common(value_a, value_b)))\
+        / N_max
     return sim
 
 
-def _similarity_dict(value_a: dict, value_b: dict) -> float:
+def _similar_str(value_a: str, value_b: str, threshold: float,
+                 counters: Optional[Dict[str, Counter]] = None) -> bool:
+    """
+    Determine whether the similarity of two strings reaches ``threshold``.
+
+    Equivalent to ``_similarity_str(value_a, value_b) >= threshold``, but
+    pairs that cannot reach the threshold are rejected using cheap lower
+    bounds on the edit distance (the difference in length, then the
+    difference in character counts) before any edit distance is computed.
+
+    Parameters
+    ----------
+    value_a : str
+    value_b : str
+    threshold : float
+    counters : dict
+        If provided, character counts of whole strings are kept here (keyed by
+        string) and reused across calls; see :func:`._similar_batch`.
+    """
+    N_max = max(len(value_a), len(value_b))
+    if N_max == 0:
+        return 0. >= threshold
+    if value_a == value_b:
+        return 1. >= threshold
+    # Each bound is checked with the same expression as the exact score, so
+    # that rounding cannot make the two disagree.
+    if (N_max - abs(len(value_a) - len(value_b))) / N_max < threshold:
+        return False
+    if counters is None:
+        stripped_a, stripped_b = _strip_common(value_a, value_b)
+        count_a, count_b = Counter(stripped_a), Counter(stripped_b)
+    else:
+        # A common prefix or suffix adds the same counts to both strings, so
+        #  the difference between counts of the whole strings is the same.
+        for value in (value_a, value_b):
+            if value not in counters:
+                counters[value] = Counter(value)
+        count_a, count_b = counters[value_a], counters[value_b]
+    bag = max(sum((count_a - count_b).values()),
+              sum((count_b - count_a).values()))
+    if (N_max - bag) / N_max < threshold:
+        return False
+    return _similarity_str(value_a, value_b) >= threshold
+
+
+def _similar_batch(pairs: Iterable[Tuple[str, str]], threshold: float) \
+        -> Dict[Tuple[str, str], bool]:
+    """
+    Determine whether each of many pairs of strings is ``threshold`` similar.
+
+    Each distinct pair (in either order) is compared once, and the character
+    counts used to reject dissimilar pairs are computed once per distinct
+    string rather than once per pair.
+
+    Parameters
+    ----------
+    pairs : iterable
+        Two-tuples of ``str``.
+    threshold : float
+
+    Returns
+    -------
+    dict
+        Results of :func:`._similar_str`, keyed by pair. Each pair is keyed
+        with the lesser string first (see :func:`._pair_key`).
+    """
+    counters: Dict[str, Counter] = {}
+    return {pair: _similar_str(pair[0], pair[1], threshold, counters)
+            for pair in {_pair_key(*pair) for pair in pairs}}
+
+
+def _pair_key(value_a: str, value_b: str) -> Tuple[str, str]:
+    """Key for a pair of strings, regardless of order."""
+    return (value_a, value_b) if value_a <= value_b else (value_b, value_a)
+
+
+@_cached
+def _similarity_dict(value_a: Union[dict, _FrozenDict],
+                     value_b: Union[dict, _FrozenDict]) -> float:
     """Similarity of two dictionaries, based on shared keys and values."""
     fields = set(value_a.keys()) | set(value_b.keys())
     scores = [_similarity(value_a.get(field, None),
@@ -80,8 +330,119 @@ def _similarity_dict(value_a: dict, value_b: dict) -> float:
     return mean(scores)
 
 
-def _similarity_list(value_a: list, value_b: list) -> float:
+def _author_name(author: Union[dict, _FrozenDict, Author], part: str) -> str:
+    if isinstance(author, (dict, _FrozenDict)):
+        return author.get(part) or ''
+    return getattr(author, part, None) or ''
+
+
+def _author_key(author: Union[dict, _FrozenDict, Author, str]) -> AuthorKey:
+    """
+    Get the normalized surname and initials of an author.
+
+    Parameters
+    ----------
+    author : dict, :class:`._FrozenDict`, :class:`.Author`, or str
+        If a ``str``, it is treated as the author's full name.
+
+    Returns
+    -------
+    tuple
+        Lowercase surname (letters only) and initials; e.g. ``('smith',
+        'jr')`` for ``{'surname': 'Smith', 'givennames': 'John R'}``,
+        ``'J. R. Smith'``, or ``'Smith, J R'``.
+    """
+    if isinstance(author, str):
+        surname, givennames, fullname = '', '', author
+    else:
+        surname, givennames, fullname = [_author_name(author, part)
+                                          for part in NAME_FIELDS]
+    if not surname:
+        if ',' in fullname:
+            surname, _, givennames = fullname.partition(',')
+        else:
+            names = fullname.split()
+            surname, givennames = (names[-1], ' '.join(names[:-1])) \
+                if names else ('', '')
+    initials = ''.join(name[0] for name
+                       in NON_NAME.split(givennames.lower()) if name)
+    return NON_NAME.sub('', surname.lower()), initials
+
+
+def _is_author_list(value: list) -> bool:
+    """Determine whether ``value`` is a list of authors."""
+    return len(value) > 0 and all(
+        isinstance(author, Author)
+        or (isinstance(author, (dict, _FrozenDict))
+            and any(part in author.keys() for part in NAME_FIELDS))
+        for author in value
+    )
+
+
+@_cached
+def _similarity_author_keys(keys_a: Tuple[AuthorKey, ...],
+                            keys_b: Tuple[AuthorKey, ...]) -> float:
+    """Similarity of two multisets of author keys (see :func:`._author_key`)."""
+    remaining_a, remaining_b = Counter(keys_a), Counter(keys_b)
+    exact = remaining_a & remaining_b
+    remaining_a -= exact
+    remaining_b -= exact
+    matched = sum(exact.values())
+    score = float(matched)
+
+    # Initials-aware fallback: e.g. "J. Smith" and "J. R. Smith", or "Smith"
+    # and "J. Smith", are probably the same author. The surname counts for
+    # half of a match, and the (consistent) initials for the rest.
+    by_surname: Dict[str, List[str]] = defaultdict(list)
+    for (surname, initials), count in remaining_b.items():
+        by_surname[surname].extend([initials] * count)
+    for (surname, initials), count in remaining_a.items():
+        candidates = by_surname.get(surname)
+        for _ in range(count):
+            compatible = [other for other in candidates or []
+                          if other.startswith(initials)
+                          or initials.startswith(other)]
+            if not compatible:
+                break
+            other = max(compatible, key=len)
+            candidates.remove(other)   # type: ignore
+            longest = max(len(initials), len(other))
+            score += 0.5 + 0.5 * min(len(initials), len(other)) / longest
+            matched += 1
+
+    total = len(keys_a) + len(keys_b) - matched
+    return score / total if total else 0.
+
+
+def _similarity_authors(value_a: list, value_b: list) -> float:
+    """
+    Similarity of two author lists (without regard to order).
+
+    Authors are reduced to their normalized surname and initials (see
+    :func:`._author_key`). Authors with identical keys are matched as a
+    multiset; the remaining authors are matched on surname with consistent
+    initials, for partial credit. The score is the matched credit over the
+    number of distinct authors in the two lists, so that unmatched authors
+    on either side count against it. Scores are cached per pair of lists
+    (see :data:`.SIMILARITY_CACHE`).
+    """
+    keys_a = tuple(sorted(map(_author_key, value_a)))
+    keys_b = tuple(sorted(map(_author_key, value_b)))
+    if keys_b < keys_a:
+        keys_a, keys_b = keys_b, keys_a
+    return _similarity_author_keys(keys_a, keys_b)
+
+
+@_cached
+def _similarity_list(value_a: Union[list, _FrozenList],
+                     value_b: Union[list, _FrozenList]) -> float:
     """Similarity of two lists, based on values (without regard to order)."""
+    if _is_author_list(value_a) and _is_author_list(value_b):
+        return _similarity_authors(value_a, value_b)
+    if value_a == value_b:
+        return 1.
+    if not value_a or not value_b:
+        return 0.
     aligned = align_records({'a': value_a, 'b': value_b})
     scores = []
     for item in aligned:
@@ -112,35 +473,48 @@ def _similarity(value_a: Any, value_b: Any) -> float:
         return _similarity_int_float(value_a, value_b)
     elif type(value_a) is str and type(value_b) is str:
         return _similarity_str(value_a, value_b)
-    elif type(value_a) is dict and type(value_b) is dict:
+    elif isinstance(value_a, (dict, _FrozenDict)) \
+            and isinstance(value_b, (dict, _FrozenDict)):
         return _similarity_dict(value_a, value_b)
-    elif type(value_a) is list and type(value_b) is list:
+    elif isinstance(value_a, (list, _FrozenList)) \
+            and isinstance(value_b, (list, _FrozenList)):
         return _similarity_list(value_a, value_b)
     if type(value_a) != type(value_b):
         logger.debug('Comparing objects with different types')
     return 0.
 
 
+def _similar(value_a: Any, value_b: Any, threshold: float) -> bool:
+    """
+    Determine whether two field values are at least ``threshold`` similar.
+
+    Equivalent to ``_similarity(value_a, value_b) >= threshold``; strings are
+    compared with :func:`._similar_str`, which can skip most of the work for
+    dissimilar strings. Use :func:`._similarity` for the score itself.
+    """
+    if type(value_a) is str and type(value_b) is str:
+        return _similar_str(value_a, value_b, threshold)
+    return _similarity(value_a, value_b) >= threshold
+
+
 def _prep_value(value: object) -> Any:
-    """Ensure that ``value`` is hashable."""
+    """Ensure that ``value`` is hashable (see :func:`._freeze`)."""
     if value.__hash__ is None:
-        return str(value)
+        try:
+            return _freeze(value)
+        except TypeError:
+            return str(value)
     return value
 
 
-def _cast_value(field: str, value: Union[str, int]) -> Any:
+def _cast_value(field: str, value: Any) -> Any:
     """Retrieve the original value type."""
     if field == 'year':
         try:
             return int(value)
         except ValueError:    # Just in case we get something odd here.
             return None
-    if field in ['authors', 'identifiers']:
-        try:
-            return list(eval(value))    # type: ignore
-        except SyntaxError:
-            return value
-    return value
+    return _thaw(value)
 
 
 def _fix_authors(authors: list) -> list:
@@ -160,8 +534,17 @@ def _fix_authors(authors: list) -> list:
 
 
 def _pool(metadata: Dict[str, Reference], fields: list, prob_valid: Callable,
-          similarity_threshold: float = 0.9) -> dict:
-    """Pool similar values for a field across extractions."""
+          similarity_threshold: float = 0.9,
+          similar: Optional[Callable[[Any, Any], bool]] = None) -> dict:
+    """
+    Pool similar values for a field across extractions.
+
+    Values are compared with ``similar``, if provided (e.g. a lookup into
+    results from :func:`._batch`), or else with :func:`._similar`.
+    """
+    if similar is None:
+        def similar(value_a: Any, value_b: Any) -> bool:
+            return _similar(value_a, value_b, similarity_threshold)
     # Similar values (above a threshold) for fields are grouped together, and
     #  their P(value|extractor, field) are combined (summed, then normalized).
     pooled: defaultdict = defaultdict(Counter)
@@ -173,7 +556,7 @@ def _pool(metadata: Dict[str, Reference], fields: list, prob_valid: Callable,
             p_value = prob_valid(extractor, field)
             match = False
             for prev_value in list(pooled[field].keys()):
-                if _similarity(value, prev_value) >= similarity_threshold:
+                if similar(value, prev_value):
                     p_prev = pooled[field][prev_value]
                     # Given that there can be same variation in values here,
                     #  if we encounter a substantially better value we should
@@ -223,7 +606,9 @@ def _score(result: dict) -> float:
 
 
 def arbitrate(metadata: List[Tuple[str, Reference]], valid: list, priors: list,
-              similarity_threshold: float = 0.9) -> Tuple[Reference, float]:
+              similarity_threshold: float = 0.9,
+              similar: Optional[Callable[[Any, Any], bool]] = None) \
+        -> Tuple[Reference, float]:
     """
     Apply arbitration logic to raw extraction metadata for a single reference.
 
@@ -240,6 +625,9 @@ def arbitrate(metadata: List[Tuple[str, Reference]], valid: list, priors: list,
         Represents prior level of trust in field output for each extractor.
     similarity_threshold : float
         Minimum similarity (0.-1.) to consider two values identical.
+    similar : callable
+        If provided, used instead of :func:`._similar` to determine whether
+        two values are at least ``similarity_threshold`` similar.
 
     Returns
     -------
@@ -271,17 +659,153 @@ def arbitrate(metadata: List[Tuple[str, Reference]], valid: list, priors: list,
         return p
 
     pooled = _pool(_metadata, fields, _prob_valid,
-                   similarity_threshold=similarity_threshold)
+                   similarity_threshold=similarity_threshold, similar=similar)
     # Here we select the value with the highest P for each field.
     return _select(pooled)
 
 
+def _batch(metadata: List[List[Tuple[str, Reference]]],
+           similarity_threshold: float = 0.9) -> Callable[[Any, Any], bool]:
+    """
+    Compare the values of :const:`.BATCH_FIELDS` for a document in one batch.
+
+    Pooling only compares values of a field within an aligned cluster, so
+    every such pair of values for every cluster is passed together to
+    :func:`._similar_batch`. Values that recur across clusters (e.g. journal
+    names) are only compared once.
+
+    Parameters
+    ----------
+    metadata : list
+        List of lists (see :func:`.arbitrate`).
+    similarity_threshold : float
+        Minimum similarity (0.-1.) to consider two values identical.
+
+    Returns
+    -------
+    callable
+        Equivalent to :func:`._similar` at ``similarity_threshold``, for use
+        by :func:`._pool`. Pairs of strings that were not in the batch are
+        passed on to :func:`._similar`.
+    """
+    pairs = []
+    for cluster in metadata:
+        for field in BATCH_FIELDS:
+            values = [getattr(metadatum, field, None)
+                      for _, metadatum in cluster]
+            values = [value for value in values if type(value) is str]
+            pairs += [(value_a, value_b)
+                      for i, value_a in enumerate(values)
+                      for value_b in values[:i]]
+    results = _similar_batch(pairs, similarity_threshold)
+
+    def _similar_batched(value_a: Any, value_b: Any) -> bool:
+        if type(value_a) is str and type(value_b) is str:
+            result = results.get(_pair_key(value_a, value_b))
+            if result is not None:
+                return result
+        return _similar(value_a, value_b, similarity_threshold)
+    return _similar_batched
+
+
+def _arbitrate_serial(metadata: List[List[Tuple[str, Reference]]],
+                      valid: list, priors: list) \
+        -> List[Tuple[Reference, float]]:
+    """Arbitrate each aligned reference in turn, in this process."""
+    similar = _batch(metadata)
+    return [arbitrate(metadatum, valid_metadatum, priors, similar=similar)
+            for metadatum, valid_metadatum in zip(metadata, valid)]
+
+
+_worker_pool: Optional[Tuple[Any, int, int]] = None
+"""
+Pool of arbitration worker processes, shared by the merges in a process, with
+its number of processes and the ID of the process that started it.
+"""
+
+
+def _get_worker_pool(processes: int) -> Any:
+    """
+    Get the pool of ``processes`` arbitration workers for this process.
+
+    The pool is started on first use, and is kept for later documents until
+    it is closed (see :func:`.close_worker_pool`). Since the merge usually
+    runs in a (daemonic) Celery worker, in which :mod:`multiprocessing` may not start children, this is a
+    pool from :mod:`billiard`, which Celery uses for its own workers. As in
+    Celery, the workers are forked: arbitration only starts once extraction
+    is done, so there are no other threads to deadlock them.
+    """
+    global _worker_pool
+    if _worker_pool is not None:
+        pool, size, pid = _worker_pool
+        # A pool inherited from a parent process is not ours to use.
+        if pid == os.getpid() and size == processes:
+            return pool
+        close_worker_pool()
+    pool = billiard.Pool(processes)
+    _worker_pool = (pool, processes, os.getpid())
+    return pool
+
+
+def close_worker_pool() -> None:
+    """
+    Stop the arbitration workers of this process, if any.
+
+    Called when the process exits, or when a Celery worker process shuts down
+    (see :mod:`references.process.tasks`). Any work that was sent to the
+    workers is finished first; they are started again if they are needed.
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        return
+    pool, _, pid = _worker_pool
+    _worker_pool = None
+    if pid == os.getpid():
+        pool.close()
+        pool.join()
+
+
+atexit.register(close_worker_pool)
+
+
+def _arbitrate_chunk(chunk: Tuple[list, list, list]) \
+        -> List[Tuple[Reference, float]]:
+    """Arbitrate a chunk of aligned references in a worker process."""
+    metadata, valid, priors = chunk
+    return _arbitrate_serial(metadata, valid, priors)
+
+
+def _arbitrate_parallel(metadata: List[List[Tuple[str, Reference]]],
+                        valid: list, priors: list, processes: int) \
+        -> List[Tuple[Reference, float]]:
+    """Arbitrate chunks of aligned references in a pool of processes."""
+    # A few chunks per process evens out the work, since some clusters take
+    #  much longer than others.
+    size = -(-len(metadata) // (processes * CHUNKS_PER_PROCESS))
+    chunks = [(metadata[i:i + size], valid[i:i + size], priors)
+              for i in range(0, len(metadata), size)]
+    # One job per chunk, rather than ``pool.map``: billiard only counts the
+    #  results of a job against one of its workers, and the others then wait
+    #  (for half a minute) for their results to be consumed when they exit.
+    pool = _get_worker_pool(processes)
+    results = [pool.apply_async(_arbitrate_chunk, (chunk,))
+               for chunk in chunks]
+    return [arbitrated for result in results for arbitrated in result.get()]
+
+
 def arbitrate_all(metadata: List[List[Tuple[str, Reference]]],
-                  valid: list, priors: list, N_extractions: int = 0) \
+                  valid: list, priors: list, N_extractions: int = 0,
+                  processes: int = 1,
+                  parallel_threshold: int = PARALLEL_THRESHOLD) \
         -> List[Tuple[Reference, float]]:
     """
     Helper to apply arbitration to metadata for a set of cited references.
 
+    Each aligned reference is arbitrated independently, so for documents with
+    at least ``parallel_threshold`` aligned references the work can be split
+    across a pool of ``processes`` processes. The result is the same, in the
+    same order, either way.
+
     Parameters
     ----------
     metadata : list
@@ -291,6 +815,12 @@ def arbitrate_all(metadata: List[List[Tuple[str, Reference]]],
     priors : list
         List of lists (see :func:`.arbitrate`).
     N_extractions : int
+    processes : int
+        Number of worker processes. If 1 (default), arbitration is done in
+        this process.
+    parallel_threshold : int
+        Minimum number of aligned references for which worker processes are
+        used.
 
     Returns
     -------
@@ -298,6 +828,10 @@ def arbitrate_all(metadata: List[List[Tuple[str, Reference]]],
         Optimal metadata for cited references. Each item is a ``dict``. See
         :func:`.arbitrate` for more details.
     """
-    N = len(metadata)
-    priors_iter = repeat(priors, N)
-    return list(map(arbitrate, metadata, valid, priors_iter))
+    if processes > 1 and len(metadata) >= parallel_threshold:
+        logger.debug('Arbitrating %i references with %i processes',
+                     len(metadata), processes)
+        return _arbitrate_parallel(metadata, valid, priors, processes)
+    arbitrated = _arbitrate_serial(metadata, valid, priors)
+    logger.debug('Similarity cache: %s', SIMILARITY_CACHE.stats())
+    return arbitrated
@@ -2,16 +2,14 @@
 
 import os
 import re
-from functools import partial
-try:
-    from array import array
-    from pybloof import StringBloomFilter
-except ImportError as e:
-    StringBloomFilter = None
-
-from typing import Callable, Dict, List, Any, Sized, Tuple
+import threading
+import time
+from collections import defaultdict
+
+from typing import Callable, Dict, List, Any, Optional, Sized, Tuple
 from arxiv.base import logging
-from references.domain import Reference
+from references.domain import Reference, Author, Identifier
+from references.process.merge import bloom
 from references.process.textutil import clean_text
 from references.util.regex_arxiv import REGEX_ARXIV_STRICT
 from references.util.regex_identifiers import (
@@ -24,51 +22,79 @@ RE_INTEGER = (
     r'(?:$|(?:\s+))'
 )
 
+INTEGER = re.compile(RE_INTEGER)
+PAGES = re.compile(r'(\d+)(?:\s+)?[\s\-._/\:]+(?:\s+)?(\d+)')
+DOI = re.compile(REGEX_DOI)
+ISBN_10 = re.compile(REGEX_ISBN_10)
+ISBN_13 = re.compile(REGEX_ISBN_13)
+ARXIV_STRICT = re.compile(REGEX_ARXIV_STRICT)
+
 logger = logging.getLogger(__name__)
 
 
+BLOOM_FILTER_STUBS = ['auth', 'title']
+"""Kinds of bloom filter; see ``data/words_bloom_filter.txt``."""
+
+FIELDS = list(Reference.FIELDS)
+
+_bloom_filters: Optional[dict] = None
+_bloom_filters_lock = threading.Lock()
+
+
 def _prepare_filters_or_not() -> dict:
     """Attempt to load bloom filters, if available."""
     try:
         return _load_filters()
     except Exception as e:
+        logger.info('Bloom filters are not available: %s', e)
         return {}
 
 
+def _bloom_filter_path(stub: str) -> str:
+    """Get the path to the bloom filter file for ``stub``."""
+    return os.path.join(os.environ.get('REFLINK_DATA_DIRECTORY', './data'),
+                        'words_bloom_filter_{}.bytes'.format(stub))
+
+
 def _load_filters() -> dict:
-    """Load bloom filters."""
-    # a size bigger than our filters but smaller than memory so we can
-    # just automatically load the whole thing without recording sizes
-    BIGNUMBER = int(1e8)
-
-    stubs = ['auth', 'title']
-    bloom_files = [
-        os.path.join(os.environ.get('REFLINK_DATA_DIRECTORY', './data'), i)
-        for i in ['words_bloom_filter_{}.bytes'.format(j) for j in stubs]
-    ]
+    """
+    Load bloom filters.
 
+    The files are memory-mapped and read in place (see :func:`.bloom.load`),
+    so that their pages are shared by all of the processes on a host.
+    """
     bloom_filters = {}
-    for stub, filename in zip(stubs, bloom_files):
-        with open(filename, 'rb') as fn:
-            try:
-                arr = array('b')
-                arr.fromfile(fn, BIGNUMBER)
-            except EOFError as e:
-                # we expect this to happen, we asked for way to many bytes, but
-                # it doesn't matter, we've successfully filled our array
-                pass
-            bfilter = StringBloomFilter.from_byte_array(arr)
-            bloom_filters[stub] = bfilter
-
+    for stub in BLOOM_FILTER_STUBS:
+        start = time.time()
+        bloom_filters[stub] = bloom.load(_bloom_filter_path(stub))
+        logger.info('Loaded %s bloom filter (%s) in %.3f seconds', stub,
+                    type(bloom_filters[stub]).__name__, time.time() - start)
     return bloom_filters
 
 
-def bloom_match(value: str, bloom_filter: StringBloomFilter) -> float:
+def get_bloom_filters() -> dict:
+    """
+    Get the bloom filters, loading them on first use.
+
+    Returns
+    -------
+    dict
+        Bloom filters keyed by stub (see :const:`.BLOOM_FILTER_STUBS`). Empty
+        if the filters could not be loaded.
+    """
+    global _bloom_filters
+    if _bloom_filters is None:
+        with _bloom_filters_lock:
+            if _bloom_filters is None:
+                _bloom_filters = _prepare_filters_or_not()
+    return _bloom_filters
+
+
+def bloom_match(value: str, bloom_filter: bloom.BloomFilter) -> float:
     """Check a string against a bloom filter."""
-    score = [
-        1 if word in bloom_filter else 0
-        for word in clean_text(value, numok=True).split()
-    ]
+    # The same value is often checked against more than one filter (e.g.
+    # ``raw``); the cleaned-up text is kept in the normalization cache.
+    score = bloom_filter.contains_many(clean_text(value, numok=True).split())
     if len(score) == 0:
         return 0.0
     return sum(score) / len(score)
@@ -145,8 +171,8 @@ def is_integer_like(value: Any) -> float:
     if not isinstance(value, str):
         return 0.
 
-    numbers: list = re.findall(RE_INTEGER, value)
-    leftovers: str = re.subn(RE_INTEGER, '', value)[0]
+    numbers: list = INTEGER.findall(value)
+    leftovers: str = INTEGER.subn('', value)[0]
 
     if not numbers:    # Nothing here that remotely looks like an integer.
         return 0.0
@@ -171,7 +197,7 @@ def is_year(value: str) -> float:
 def is_year_like(value: str) -> float:
     """Asserts that a value could be coerced to something like a year."""
     try:
-        numbers = re.findall(RE_INTEGER, value)
+        numbers = INTEGER.findall(value)
         if not numbers:
             return 0.0
         return (1. * sum([is_year(i) for i in numbers]))/len(numbers)
@@ -181,8 +207,7 @@ def is_year_like(value: str) -> float:
 
 def is_pages(value: str) -> float:
     """Asserts that a value looks like page number(s)."""
-    pages = re.compile(r'(\d+)(?:\s+)?[\s\-._/\:]+(?:\s+)?(\d+)')
-    match = pages.match(value)
+    match = PAGES.match(value)
 
     if match:
         start, end = [int(i) for i in match.groups()]
@@ -194,7 +219,7 @@ def is_pages(value: str) -> float:
 
 def valid_doi(value: str) -> float:
     """Asserts that a value is a valid DOI."""
-    if re.match(REGEX_DOI, value):
+    if DOI.match(value):
         return 1.0
     return 0.0
 
@@ -209,9 +234,9 @@ def valid_identifier(value: list) -> float:
         idvalue = ID.get('identifier', '')
 
         if idtype == 'isbn':
-            if re.match(REGEX_ISBN_10, idvalue):
+            if ISBN_10.match(idvalue):
                 num_good += 1
-            elif re.match(REGEX_ISBN_13, idvalue):
+            elif ISBN_13.match(idvalue):
                 num_good += 1
 
     return num_good / num_identifiers
@@ -219,7 +244,7 @@ def valid_identifier(value: list) -> float:
 
 def valid_arxiv_id(value: str) -> float:
     """Asserts that a value is a valid arXiv paper ID."""
-    if re.match(REGEX_ARXIV_STRICT, value):
+    if ARXIV_STRICT.match(value):
         return 1.0
     return 0.0
 
@@ -229,12 +254,22 @@ def unity(r: Any) -> float:
     return 1.0
 
 
-bloom_filters = _prepare_filters_or_not()
-words_title: Callable = unity
-words_auth: Callable = unity
-if StringBloomFilter and bloom_filters:
-    words_title = partial(bloom_match, bloom_filter=bloom_filters['title'])
-    words_auth = partial(bloom_match, bloom_filter=bloom_filters['auth'])
+def _words(value: str, stub: str) -> float:
+    """Check a string against a bloom filter, if available."""
+    bloom_filter = get_bloom_filters().get(stub)
+    if bloom_filter is None:
+        return unity(value)
+    return bloom_match(value, bloom_filter)
+
+
+def words_title(value: str) -> float:
+    """Fraction of words in ``value`` that are known title words."""
+    return _words(value, 'title')
+
+
+def words_auth(value: str) -> float:
+    """Fraction of words in ``value`` that are known author names."""
+    return _words(value, 'auth')
 
 
 def words_author_structure(value: list) -> float:
@@ -270,6 +305,24 @@ BELIEF_FUNCTIONS: Dict[str, List[Callable]] = {
 }
 
 
+def _belief(key: str, value: Any) -> float:
+    """Calculate the belief about a single field value."""
+    if not value:
+        # Blank values are perfectly plausible, and there isn't much else
+        # that we can say about them.
+        return 1.
+    funcs: list = BELIEF_FUNCTIONS.get(key, [unity])
+    score = 0.
+    for func in funcs:
+        # We don't want the whole process to get derailed when one
+        #  function fails.
+        try:
+            score += func(value)
+        except Exception as e:
+            logger.error('Validation for %s failed with: %s', key, e)
+    return score/len(funcs)
+
+
 def calculate_belief(reference: Reference) -> dict:
     """
     Calculate the beliefs about the elements in a single record.
@@ -288,25 +341,49 @@ def calculate_belief(reference: Reference) -> dict:
         The same structure as the input but with probabilities instead of
         the values that came in
     """
-    output = {}
+    return {key: _belief(key, value)
+            for key, value in reference.to_dict().items()}
+
+
+def _field_values(reference: Reference) -> Dict[str, Any]:
+    """
+    Get the values of a reference, as in :meth:`.Reference.to_dict`.
+
+    Nothing is copied, since beliefs do not change the values: any
+    :class:`.Author` or :class:`.Identifier` in a list is converted to
+    ``dict``, and everything else is used as it is.
+    """
+    values = {}
+    for key in FIELDS:
+        value = getattr(reference, key)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = [item.to_dict() if isinstance(item, (Author, Identifier))
+                     else item for item in value]
+        values[key] = value
+    return values
 
-    for key, value in reference.to_dict().items():
-        if not value:
-            # Blank values are perfectly plausible, and there isn't much else
-            # that we can say about them.
-            output[key] = 1.
+
+def _column_beliefs(key: str, values: list) -> List[float]:
+    """
+    Calculate the beliefs about all of the values of a single field.
+
+    Values often repeat within a document (e.g. years and journal names), so
+    the belief about each distinct (hashable) value is only calculated once.
+    """
+    beliefs: Dict[Any, float] = {}
+    column = []
+    for value in values:
+        if value.__hash__ is None:
+            column.append(_belief(key, value))
             continue
-        funcs: list = BELIEF_FUNCTIONS.get(key, [unity])
-        score = 0.
-        for func in funcs:
-            # We don't want the whole process to get derailed when one
-            #  function fails.
-            try:
-                score += func(value)
-            except Exception as e:
-                logger.error('Validation for %s failed with: %s', key, e)
-        output[key] = score/len(funcs)
-    return output
+        # ``1 == 1.0 == True``, but their beliefs may differ.
+        distinct = (type(value), value)
+        if distinct not in beliefs:
+            beliefs[distinct] = _belief(key, value)
+        column.append(beliefs[distinct])
+    return column
 
 
 def identity_belief(reference: dict) -> dict:
@@ -346,9 +423,24 @@ def validate(aligned_references: list) -> List[List[Tuple[str, dict]]]:
         have the same shape as ``aligned_references``, except that values are
         replaced by floats in the range 0.0 to 1.0.
     """
+    # Beliefs are calculated one field at a time for the whole document,
+    #  rather than one reference at a time; the result is the same as
+    #  applying :func:`.calculate_belief` to each reference.
+    records = [_field_values(metadatum)
+               for reference in aligned_references
+               for _, metadatum in reference]
+    columns: Dict[str, list] = defaultdict(list)
+    for record in records:
+        for key, value in record.items():
+            columns[key].append(value)
+    column_beliefs = {key: iter(_column_beliefs(key, values))
+                      for key, values in columns.items()}
+
+    beliefs = iter([
+        {key: next(column_beliefs[key]) for key in record}
+        for record in records
+    ])
     return [
-        [
-            (extractor, calculate_belief(metadatum))
-            for extractor, metadatum in reference
-        ] for reference in aligned_references
+        [(extractor, next(beliefs)) for extractor, _ in reference]
+        for reference in aligned_references
     ]
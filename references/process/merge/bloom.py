@@ -0,0 +1,319 @@
+"""
+Bloom filters of known words, used by the belief functions.
+
+Filters are written with a self-describing header (see :const:`.HEADER`), and
+are read in place from memory-mapped files so that processes on the same
+host share the pages of the filter. Each word sets bits in a single block of
+:const:`.BLOCK_BITS` bits, so that checking a word touches one cache line.
+
+Filters in the older format written by ``pybloof`` (``StringBloomFilter``)
+can also be read; see :class:`.LegacyBloomFilter`.
+
+To build a filter from text files (one or more words per line), run::
+
+    python -m references.process.merge.bloom words.txt \\
+        -o data/words_bloom_filter_title.bytes [--error-rate 0.01]
+"""
+
+import argparse
+import hashlib
+import math
+import mmap
+import struct
+import sys
+from typing import Dict, Iterable, List, Tuple, Union
+
+from arxiv.base import logging
+from references.process.textutil import clean_text
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RBLF'
+"""Marks a file written by :meth:`.BlockedBloomFilter.to_bytes`."""
+
+VERSION = 1
+"""Version of the file format written by this module."""
+
+HEADER = struct.Struct('!4sHHQ')
+"""Magic, format version, number of hashes, and number of blocks."""
+
+BLOCK_BITS = 512
+BLOCK_BYTES = BLOCK_BITS // 8
+
+MAX_HASHES = 28
+"""Each hash takes two bytes of a single :func:`hashlib.blake2b` digest."""
+
+LEGACY_HEADER = struct.Struct('!III')
+"""Size in bytes, size in bits, and number of hashes (``pybloof``)."""
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class BlockedBloomFilter(object):
+    """
+    Bloom filter in which all of the bits for a word are in the same block.
+
+    Parameters
+    ----------
+    blocks : int
+        Number of blocks of :const:`.BLOCK_BITS` bits.
+    hashes : int
+        Number of bits set for each word.
+    data : bytes-like
+        Bits of an existing filter. If not provided, the filter is empty and
+        words can be added.
+    """
+
+    def __init__(self, blocks: int, hashes: int,
+                 data: Union[Buffer, None] = None) -> None:
+        """Set up the filter."""
+        if not 0 < hashes <= MAX_HASHES:
+            raise ValueError('Number of hashes must be 1 to %i' % MAX_HASHES)
+        if blocks < 1:
+            raise ValueError('At least one block is required')
+        if data is None:
+            data = bytearray(blocks * BLOCK_BYTES)
+        elif len(data) != blocks * BLOCK_BYTES:
+            raise ValueError('Expected %i bytes, got %i'
+                             % (blocks * BLOCK_BYTES, len(data)))
+        self.blocks = blocks
+        self.hashes = hashes
+        self.data = data
+
+    @classmethod
+    def for_capacity(cls, words: int, error_rate: float = 0.01) \
+            -> 'BlockedBloomFilter':
+        """
+        Make an empty filter for ``words`` words.
+
+        The size and number of hashes are those of a standard bloom filter
+        with a false positive rate of ``error_rate``. Blocking makes the rate
+        a little higher in practice.
+        """
+        bits = -words * math.log(error_rate) / math.log(2) ** 2
+        blocks = max(1, int(math.ceil(bits / BLOCK_BITS)))
+        hashes = int(round(blocks * BLOCK_BITS / max(words, 1) * math.log(2)))
+        return cls(blocks, min(max(hashes, 1), MAX_HASHES))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'BlockedBloomFilter':
+        """Read a filter (with its header), without copying its bits."""
+        magic, version, hashes, blocks = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError('Not a blocked bloom filter')
+        if version != VERSION:
+            raise ValueError('Unsupported bloom filter version: %i' % version)
+        return cls(blocks, hashes, memoryview(buffer)[HEADER.size:])
+
+    def to_bytes(self) -> bytes:
+        """Write the filter, with its header."""
+        return HEADER.pack(MAGIC, VERSION, self.hashes, self.blocks) \
+            + bytes(self.data)
+
+    def _positions(self, word: str) -> Tuple[int, List[int]]:
+        """Get the offset of the block for ``word``, and its bits therein."""
+        digest = hashlib.blake2b(word.encode('utf-8'),
+                                 digest_size=8 + 2 * self.hashes).digest()
+        offset = int.from_bytes(digest[:8], 'little') % self.blocks
+        bits = [int.from_bytes(digest[i:i + 2], 'little') % BLOCK_BITS
+                for i in range(8, len(digest), 2)]
+        return offset * BLOCK_BYTES, bits
+
+    def add(self, word: str) -> None:
+        """Add a word to the filter."""
+        offset, bits = self._positions(word)
+        for bit in bits:
+            self.data[offset + (bit >> 3)] |= 1 << (bit & 7)
+
+    def __contains__(self, word: str) -> bool:
+        """Check whether ``word`` is (probably) in the filter."""
+        offset, bits = self._positions(word)
+        data = self.data
+        for bit in bits:
+            if not data[offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def contains_many(self, words: Iterable[str]) -> List[bool]:
+        """Check each of ``words``; see :func:`.contains_many`."""
+        return contains_many(self, words)
+
+
+class LegacyBloomFilter(object):
+    """
+    Read-only bloom filter in the format written by ``pybloof``.
+
+    ``pybloof`` sets bit ``(h1 + i * h2) % size`` (most significant bit of
+    each byte first) for ``i`` in ``range(hashes)``, where ``h1`` and ``h2``
+    are the first halves of two 128-bit MurmurHash3 hashes of the UTF-8
+    encoded word (see :func:`.murmur3_x64_128`).
+    """
+
+    def __init__(self, size: int, hashes: int, data: Buffer) -> None:
+        """Set up the filter."""
+        self.size = size
+        self.hashes = hashes
+        self.data = data
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'LegacyBloomFilter':
+        """Read a filter (with its header), without copying its bits."""
+        length, size, hashes = LEGACY_HEADER.unpack_from(buffer)
+        if length != len(buffer) - LEGACY_HEADER.size or size > length * 8:
+            raise ValueError('Not a pybloof bloom filter')
+        return cls(size, hashes, memoryview(buffer)[LEGACY_HEADER.size:])
+
+    def __contains__(self, word: str) -> bool:
+        """Check whether ``word`` is (probably) in the filter."""
+        key = word.encode('utf-8')
+        h1, seed = murmur3_x64_128(key)
+        h2, _ = murmur3_x64_128(key, seed & 0xFFFFFFFF)
+        data = self.data
+        for i in range(self.hashes):
+            bit = ((h1 + i * h2) & MASK_64) % self.size
+            if not data[bit >> 3] & (0x80 >> (bit & 7)):
+                return False
+        return True
+
+    def contains_many(self, words: Iterable[str]) -> List[bool]:
+        """Check each of ``words``; see :func:`.contains_many`."""
+        return contains_many(self, words)
+
+
+BloomFilter = Union[BlockedBloomFilter, LegacyBloomFilter]
+
+
+def contains_many(bloom_filter: BloomFilter, words: Iterable[str]) \
+        -> List[bool]:
+    """
+    Check whether each of ``words`` is (probably) in ``bloom_filter``.
+
+    Words in a reference (or a document) repeat a lot, so each distinct word
+    is only looked up once.
+    """
+    words = list(words)
+    found: Dict[str, bool] = {}
+    for word in words:
+        if word not in found:
+            found[word] = word in bloom_filter
+    return [found[word] for word in words]
+
+
+def from_buffer(buffer: Buffer) -> BloomFilter:
+    """Read a filter in either format; see :func:`.load`."""
+    if bytes(buffer[:len(MAGIC)]) == MAGIC:
+        return BlockedBloomFilter.from_buffer(buffer)
+    return LegacyBloomFilter.from_buffer(buffer)
+
+
+def load(path: str) -> BloomFilter:
+    """
+    Load a bloom filter from a memory-mapped file.
+
+    The file stays mapped for as long as the filter is in use, and is read in
+    place, so the pages are shared by every process that loads it.
+
+    Parameters
+    ----------
+    path : str
+        A file written by :meth:`.BlockedBloomFilter.to_bytes`, or by
+        ``pybloof``'s ``StringBloomFilter.to_byte_array``.
+
+    Returns
+    -------
+    :class:`.BlockedBloomFilter` or :class:`.LegacyBloomFilter`
+    """
+    with open(path, 'rb') as f:
+        # The mapping stays valid after the file is closed.
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return from_buffer(data)
+
+
+def _rotl64(value: int, bits: int) -> int:
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+def _fmix64(k: int) -> int:
+    k ^= k >> 33
+    k = (k * 0xff51afd7ed558ccd) & MASK_64
+    k ^= k >> 33
+    k = (k * 0xc4ceb9fe1a85ec53) & MASK_64
+    k ^= k >> 33
+    return k
+
+
+def murmur3_x64_128(key: bytes, seed: int = 0) -> Tuple[int, int]:
+    """
+    MurmurHash3 (``x64_128``) of ``key``, as two unsigned 64-bit halves.
+
+    This is the hash used by ``pybloof``, for :class:`.LegacyBloomFilter`.
+    """
+    c1, c2 = 0x87c37b91114253d5, 0x4cf5ad432745937f
+    h1 = h2 = seed
+    length = len(key)
+    end = length - length % 16
+    for i in range(0, end, 16):
+        k1 = int.from_bytes(key[i:i + 8], 'little')
+        k2 = int.from_bytes(key[i + 8:i + 16], 'little')
+
+        k1 = (_rotl64((k1 * c1) & MASK_64, 31) * c2) & MASK_64
+        h1 ^= k1
+        h1 = (_rotl64(h1, 27) + h2) & MASK_64
+        h1 = (h1 * 5 + 0x52dce729) & MASK_64
+
+        k2 = (_rotl64((k2 * c2) & MASK_64, 33) * c1) & MASK_64
+        h2 ^= k2
+        h2 = (_rotl64(h2, 31) + h1) & MASK_64
+        h2 = (h2 * 5 + 0x38495ab5) & MASK_64
+
+    tail = key[end:]
+    if len(tail) > 8:
+        k2 = int.from_bytes(tail[8:], 'little')
+        h2 ^= (_rotl64((k2 * c2) & MASK_64, 33) * c1) & MASK_64
+    if tail:
+        k1 = int.from_bytes(tail[:8], 'little')
+        h1 ^= (_rotl64((k1 * c1) & MASK_64, 31) * c2) & MASK_64
+
+    h1 ^= length
+    h2 ^= length
+    h1 = (h1 + h2) & MASK_64
+    h2 = (h2 + h1) & MASK_64
+    h1, h2 = _fmix64(h1), _fmix64(h2)
+    h1 = (h1 + h2) & MASK_64
+    h2 = (h2 + h1) & MASK_64
+    return h1, h2
+
+
+def build(lines: Iterable[str], error_rate: float = 0.01) \
+        -> BlockedBloomFilter:
+    """Build a filter of the words in ``lines`` (see :func:`.clean_text`)."""
+    words = {word for line in lines
+             for word in clean_text(line, numok=True).split()}
+    bloom_filter = BlockedBloomFilter.for_capacity(len(words), error_rate)
+    for word in words:
+        bloom_filter.add(word)
+    logger.info('Built bloom filter of %i words with %i blocks, %i hashes',
+                len(words), bloom_filter.blocks, bloom_filter.hashes)
+    return bloom_filter
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Build a bloom filter of the words in text files.'
+    )
+    parser.add_argument('sources', nargs='*', help='Default: stdin.')
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    def _lines() -> Iterable[str]:
+        if not args.sources:
+            yield from sys.stdin
+        for source in args.sources:
+            with open(source) as f:
+                yield from f
+
+    with open(args.output, 'wb') as f:
+        f.write(build(_lines(), args.error_rate).to_bytes())
@@ -5,16 +5,29 @@ from decimal import Decimal
 import re
 from typing import Tuple, Union, List, Callable
 
-from references.domain import Reference
+from references.domain import Reference, ColumnarReferenceSet
 from arxiv import taxonomy
 from arxiv.base import logging
 
 logger = logging.getLogger(__name__)
 
 
+DOTS = re.compile(r"\.\s*")
+LEADING_TRAILING_NONALPHA = re.compile(r"^[^0-9a-zA-Z]+|[^0-9a-zA-Z]+$")
+
+ARXIV_TYPOS = {category.replace('-', ''): category
+               for category in taxonomy.ARCHIVES.keys() if '-' in category}
+"""Archive names with the hyphen missing, e.g. ``hepth``."""
+
+# Longer names first, so that e.g. ``mathph`` is not taken for ``math``.
+ARXIV_TYPO = re.compile('|'.join(
+    re.escape(typo) for typo in sorted(ARXIV_TYPOS, key=len, reverse=True)
+))
+
+
 def _remove_dots(string: str) -> str:
     """Remove dots while preserving whitespace."""
-    return re.sub(r"\.\s*", " ", string).strip()
+    return DOTS.sub(" ", string).strip()
 
 
 def _remove_dots_from_author_names(author: dict) -> dict:
@@ -30,18 +43,14 @@ def _remove_dots_from_author_names(author: dict) -> dict:
 
 def _remove_leading_trailing_nonalpha(string: str) -> str:
     """Remove leading or trailing non-alphanumeric characters."""
-    return re.sub(r"[^0-9a-zA-Z]+$", "", re.sub(r"^[^0-9a-zA-Z]+", "", string))
+    return LEADING_TRAILING_NONALPHA.sub("", string)
 
 
 def _fix_arxiv_id(value: Union[list, str]) -> Union[list, str]:
-    """Fix common mistakes in arXiv identifiers."""
+    """Fix common mistakes in arXiv identifiers, e.g. ``hepth/9901001``."""
     if isinstance(value, list):
         return [_fix_arxiv_id(obj) for obj in value]
-    for category in taxonomy.ARCHIVES.keys():
-        typo = category.replace('-', '')
-        if typo in value:
-            return value.replace(typo, category)
-    return value
+    return ARXIV_TYPO.sub(lambda match: ARXIV_TYPOS[match.group(0)], value)
 
 
 NORMALIZERS: List[Tuple[str, Callable]] = [
@@ -65,13 +74,10 @@ def normalize_record(record: Reference) -> Reference:
     dict
     """
     for field, normalizer in NORMALIZERS:
-        value = getattr(record, field, None)
-        if value is None:
-            continue
-        if isinstance(value, list):
-            setattr(record, field, [normalizer(obj) for obj in value])
-        else:
-            setattr(record, field, normalizer(value))
+        value = getattr(record, field)
+        if value is not None:
+            setattr(record, field, [normalizer(obj) for obj in value]
+                    if isinstance(value, list) else normalizer(value))
     return record
 
 
@@ -91,6 +97,37 @@ def normalize_records(records: List[Reference]) -> List[Reference]:
     return [normalize_record(record) for record in records]
 
 
+def normalize_columns(columnar: ColumnarReferenceSet) \
+        -> ColumnarReferenceSet:
+    """
+    Perform the normalization of :func:`.normalize_record` on columns.
+
+    Each normalizer is applied to its column (or, for authors, to the table
+    of all authors) as a whole, without making each :class:`.Reference`.
+
+    Parameters
+    ----------
+    columnar : :class:`.ColumnarReferenceSet`
+        Normalized in place.
+
+    Returns
+    -------
+    :class:`.ColumnarReferenceSet`
+    """
+    for field, normalizer in NORMALIZERS:
+        if field == 'authors':
+            columnar.authors = [normalizer(author)
+                                for author in columnar.authors]
+            continue
+        columnar.columns[field] = [
+            value if value is None
+            else [normalizer(obj) for obj in value]
+            if isinstance(value, list) else normalizer(value)
+            for value in columnar.columns[field]
+        ]
+    return columnar
+
+
 def filter_records(records: List[Tuple[Reference, float]],
                    threshold: float = 0.5) -> Tuple[List[Reference], float]:
     """
@@ -1,5 +1,9 @@
 import json
+import random
+import statistics
 import unittest
+from collections import Counter
+from unittest import mock
 
 from references.domain import Reference
 from references.process.merge import align
@@ -14,6 +18,20 @@ def obj_digest(obj):
     return json.dumps(obj, sort_keys=True, indent=2)
 
 
+def distinct_references():
+    """A few references that have nothing in common."""
+    return [
+        Reference(title='Quantum chromodynamics on the lattice',
+                  source='Phys Rev D', year='1998'),
+        Reference(title='Dark matter in dwarf galaxies',
+                  source='Astrophys J', year='2004'),
+        Reference(title='Neutrino oscillations at long baselines',
+                  source='Nucl Phys B', year='2011'),
+        Reference(title='Topological insulators and superconductors',
+                  source='Rev Mod Phys', year='2010'),
+    ]
+
+
 class TestAlignRecords(unittest.TestCase):
     def test_simple_records(self):
         """Regression test for alignment with fake records."""
@@ -48,3 +66,288 @@ class TestAlignRecords(unittest.TestCase):
         aligned_calc = align.align_records(docs)
         for ref_ans, ref_calc in zip(aligned_answer, aligned_calc):
             self.assertDictEqual(dict(ref_ans), dict(ref_calc))
+
+
+class TestFeatures(unittest.TestCase):
+    """Tests for :func:`.align.extract_features`."""
+
+    def test_features_match_digest(self):
+        """Each reference is represented by the words in its digest."""
+        ref = Reference(title='Matt', year=2011)
+        features = align.extract_features({'ext1': [ref]})
+        self.assertEqual(features['ext1'][0],
+                         frozenset(align.digest(ref).split()))
+
+    def test_jacard_tokens_matches_jacard(self):
+        """Scores on word sets are identical to scores on strings."""
+        pairs = [('the quick brown fox', 'the lazy brown dog'),
+                 ('a a b', 'b c'), ('', ''), ('foo', '')]
+        for str0, str1 in pairs:
+            self.assertEqual(
+                align.jacard(str0, str1),
+                align.jacard_tokens(frozenset(str0.split()),
+                                    frozenset(str1.split()))
+            )
+
+
+class TestJacardMatrix(unittest.TestCase):
+    """Tests for :class:`.align.JacardMatrix`."""
+
+    def setUp(self):
+        """Given two extractions with common and rare words..."""
+        common = 'reference title raw authors year'
+        self.features = {
+            'ext1': [
+                frozenset((common + ' matt 2011').split()),
+                frozenset((common + ' erick 2013').split()),
+                frozenset('title'.split()),
+                frozenset(),
+            ],
+            'ext2': [
+                frozenset((common + ' matt 2011').split()),
+                frozenset((common + ' eric 2013').split()),
+                frozenset((common + ' john').split()),
+                frozenset(),
+                frozenset('only rare words'.split()),
+            ]
+        }
+        terms = align.term_matrices(self.features)
+        self.matrix = align.JacardMatrix(terms['ext1'], terms['ext2'])
+
+    def test_scores_are_identical_to_jacard(self):
+        """Every cell is exactly the pairwise jacard score."""
+        for i, words0 in enumerate(self.features['ext1']):
+            for j, words1 in enumerate(self.features['ext2']):
+                self.assertEqual(self.matrix.get(i, j),
+                                 align.jacard_tokens(words0, words1))
+
+    def test_counts_cover_all_cells(self):
+        """:meth:`.JacardMatrix.counts` generates the multiset of scores."""
+        expected = sorted(
+            align.jacard_tokens(words0, words1)
+            for words0 in self.features['ext1']
+            for words1 in self.features['ext2']
+        )
+        calculated = sorted(
+            score for score, count in self.matrix.counts()
+            for _ in range(count)
+        )
+        self.assertEqual(calculated, expected)
+
+    def test_above(self):
+        """Only scores above the cutoff are returned."""
+        for i in range(len(self.matrix)):
+            expected = {
+                j: align.jacard_tokens(self.features['ext1'][i], words1)
+                for j, words1 in enumerate(self.features['ext2'])
+                if align.jacard_tokens(self.features['ext1'][i], words1) > 0.3
+            }
+            self.assertEqual(self.matrix.above(i, 0.3), expected)
+
+
+class TestCutoff(unittest.TestCase):
+    """Tests for the streaming similarity cutoff."""
+
+    def setUp(self):
+        """Given some (score, count) pairs..."""
+        rng = random.Random(42)
+        self.counts = [(rng.choice([0.0, 0.1, 0.2, 1 / 3, 0.5, 0.8]),
+                        rng.randint(1, 5)) for _ in range(200)]
+        self.data = [score for score, count in self.counts
+                     for _ in range(count)]
+
+    def test_weighted_median(self):
+        """The weighted median is the median of the expanded values."""
+        for size in range(1, 40):
+            histogram = Counter(self.data[:size])
+            self.assertEqual(align.weighted_median(histogram),
+                             statistics.median(self.data[:size]))
+        with self.assertRaises(statistics.StatisticsError):
+            align.weighted_median({})
+
+    def test_exact(self):
+        """The exact cutoff matches the cutoff on the expanded scores."""
+        median = statistics.median(self.data)
+        mad = 1.4826 * statistics.median([abs(d - median)
+                                          for d in self.data])
+        self.assertEqual(align.mad_cutoff(iter(self.counts)),
+                         median + 3 * mad)
+
+    def test_approximate(self):
+        """The approximate cutoff is within the bound of the exact cutoff."""
+        exact = align.mad_cutoff(self.counts)
+        for resolution in [0.001, 0.01, 0.05]:
+            approximate = align.mad_cutoff(self.counts, resolution)
+            bound = resolution / 2 + 3 * 1.4826 * resolution
+            self.assertLessEqual(abs(approximate - exact), bound)
+
+
+class TestBandedAlignment(unittest.TestCase):
+    """Tests for the :const:`.align.BANDED` alignment strategy."""
+
+    def setUp(self):
+        """Given a few distinct references..."""
+        self.refs = distinct_references()
+
+    def test_preserves_document_order(self):
+        """References missing from one extraction are kept in place."""
+        docs = {'ext1': self.refs, 'ext2': self.refs[:1] + self.refs[2:]}
+        aligned = align.align_records(docs, strategy=align.BANDED)
+        self.assertEqual(len(aligned), 4)
+        for ref, cluster in zip(self.refs, aligned):
+            for _, aligned_ref in cluster:
+                self.assertEqual(aligned_ref, ref)
+        self.assertEqual(len(aligned[1]), 1)
+
+    def test_falls_back_to_greedy(self):
+        """If the extraction is out of order, greedy alignment is used."""
+        docs = {'ext1': self.refs, 'ext2': list(reversed(self.refs))}
+        banded = align.align_records(docs, strategy=align.BANDED)
+        greedy = align.align_records(docs, strategy=align.GREEDY)
+        self.assertEqual(banded, greedy)
+        self.assertEqual(len(banded), 4)
+
+    def test_unknown_strategy(self):
+        """A ValueError is raised for an unknown strategy."""
+        with self.assertRaises(ValueError):
+            align.align_records({'ext1': self.refs}, strategy='foo')
+
+
+class TestGlobalAlignment(unittest.TestCase):
+    """Tests for the :const:`.align.GLOBAL` alignment strategy."""
+
+    def test_hungarian(self):
+        """The assignment with the lowest total cost is found."""
+        # Greedily taking the cheapest cell (0, 0) would cost -9 in total.
+        cost = [[-5., -4., 0.], [-4., 0., 0.]]
+        self.assertEqual(align._hungarian(cost), [1, 0])
+
+    def test_aligns_shuffled_extraction(self):
+        """Each reference is matched, regardless of order."""
+        refs = distinct_references()
+        docs = {'ext1': refs, 'ext2': [refs[2], refs[0], refs[3]]}
+        aligned = align.align_records(docs, strategy=align.GLOBAL)
+        self.assertEqual(len(aligned), 4)
+        for cluster in aligned:
+            self.assertEqual(len({ref.title for _, ref in cluster}), 1)
+        self.assertEqual(sorted(len(cluster) for cluster in aligned),
+                         [1, 2, 2, 2])
+
+    def test_leftover_cluster(self):
+        """A reference is not matched with a cluster that suits it poorly."""
+        class Scores(object):
+            def above(self, i, cutoff):
+                return {j: score for j, score in enumerate(scores[i])
+                        if score > cutoff}
+
+        # The third reference is most like the clusters taken by the first
+        # two; it is only just above the cutoff with the last cluster.
+        scores = [[0.99, 0.7, 0.], [0.7, 0.99, 0.], [0.95, 0.93, 0.65]]
+        clusters = [[('ext1', 0)], [('ext1', 1)], [('ext1', 2)]]
+        matrices = {('ext2', 'ext1'): Scores()}
+        self.assertEqual(
+            align._align_global(clusters, 'ext2', 3, matrices, 0.6),
+            [[('ext1', 0), ('ext2', 0)], [('ext1', 1), ('ext2', 1)],
+             [('ext1', 2)], [('ext2', 2)]]
+        )
+        self.assertEqual(
+            align._align_global(clusters, 'ext2', 3, matrices, 0.6,
+                                candidates=3)[2],
+            [('ext1', 2), ('ext2', 2)]
+        )
+
+
+class TestBlocking(unittest.TestCase):
+    """Tests for LSH blocking of candidate pairs."""
+
+    def setUp(self):
+        """Given a few distinct references..."""
+        self.refs = distinct_references()
+
+    def test_minhash_is_deterministic(self):
+        """The same terms always get the same keys."""
+        terms = {3, 5, 8, 13}
+        keys = align.MinHash().keys(terms)
+        self.assertEqual(keys, align.MinHash().keys(frozenset(terms)))
+        self.assertEqual(len(keys), 32)
+        self.assertEqual(align.MinHash().keys(set()), [])
+
+    def test_candidates_are_exact(self):
+        """Candidate pairs have the same score as in the full matrix."""
+        docs = {'ext1': self.refs, 'ext2': list(reversed(self.refs))}
+        terms = align.term_matrices(align.extract_features(docs))
+        full = align.similarity_matrix(terms, 'ext2', 'ext1')
+        blocked = align.similarity_matrix(terms, 'ext2', 'ext1',
+                                          align.lsh_keys(terms))
+        for i in range(4):
+            self.assertIn(3 - i, blocked.shared[i])
+            for j in range(4):
+                if j in blocked.shared[i]:
+                    self.assertEqual(blocked.get(i, j), full.get(i, j))
+                else:
+                    self.assertEqual(blocked.get(i, j), 0.0)
+        self.assertEqual(sum(count for _, count in blocked.counts()), 16)
+
+    def test_blocked_alignment(self):
+        """Blocking is used if there are enough references."""
+        docs = {'ext1': self.refs, 'ext2': self.refs[:1] + self.refs[2:]}
+        with mock.patch.object(align, 'BlockedJacardMatrix',
+                               wraps=align.BlockedJacardMatrix) as blocked:
+            aligned = align.align_records(docs, blocking_threshold=4)
+            self.assertTrue(blocked.called)
+        self.assertEqual(aligned, align.align_records(docs,
+                                                      blocking_threshold=None))
+
+
+class TestIncrementalAligner(unittest.TestCase):
+    """Tests for :class:`.align.IncrementalAligner`."""
+
+    def setUp(self):
+        """Given some extractions..."""
+        self.records = {}
+        for extension, label in zip(extensions, labels):
+            with open(testfile + extension) as f:
+                self.records[label] = [Reference(**{
+                    key: value for key, value in datum.items()
+                    if key in Reference.__annotations__
+                }) for datum in json.load(f)]
+
+    def test_same_as_align_records(self):
+        """Adding extractions one at a time gives the same alignment."""
+        for strategy in align.STRATEGIES:
+            expected = align.align_records(self.records, strategy=strategy)
+            aligner = align.IncrementalAligner(strategy)
+            for label in labels:
+                aligner.add_extraction(label, self.records[label])
+                aligner.aligned()
+            self.assertEqual(len(aligner), 3)
+            self.assertEqual(aligner.aligned(), expected)
+
+    def test_cutoff_resolution(self):
+        """The resolution of the cutoff is passed on to the MAD cutoff."""
+        with mock.patch.object(align, 'mad_cutoff',
+                               wraps=align.mad_cutoff) as cutoff:
+            align.align_records(self.records, cutoff_resolution=0.01)
+            self.assertEqual(cutoff.call_args[0][1], 0.01)
+            align.align_records(self.records)
+            self.assertIsNone(cutoff.call_args[0][1])
+
+    def test_provisional(self):
+        """Extractions can be aligned before all of them are added."""
+        aligner = align.IncrementalAligner()
+        self.assertEqual(aligner.aligned(), [])
+        aligner.add_extraction('grobid', self.records['grobid'])
+        self.assertEqual(len(aligner.aligned()), len(self.records['grobid']))
+        aligner.add_extraction('cermine', self.records['cermine'])
+        self.assertEqual(
+            aligner.aligned(),
+            align.align_records({'grobid': self.records['grobid'],
+                                 'cermine': self.records['cermine']})
+        )
+
+    def test_add_twice(self):
+        """An extraction can only be added once."""
+        aligner = align.IncrementalAligner()
+        aligner.add_extraction('grobid', self.records['grobid'])
+        with self.assertRaises(ValueError):
+            aligner.add_extraction('grobid', self.records['grobid'])
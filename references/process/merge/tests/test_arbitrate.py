@@ -1,7 +1,13 @@
 """Unit tests for :mod:`references.process.merge.arbitrate`."""
 
+import multiprocessing
+import random
+import threading
 import unittest
-from references.domain import Reference
+from typing import Any
+from unittest import mock
+
+from references.domain import Reference, Author
 from references.process.merge import arbitrate
 
 
@@ -119,7 +125,7 @@ class TestArbitrate(unittest.TestCase):
         except Exception as e:
             self.fail(str(e))
 
-        self.assertEqual(pooled['title'][str(['meh', 'meh'])], 1.1)
+        self.assertEqual(pooled['title'][('meh', 'meh')], 1.1)
 
     def test_pool_handles_dict_values(self):
         """:func:`.arbitrate._pool` can handle dicts."""
@@ -265,3 +271,360 @@ class TestArbitrate(unittest.TestCase):
         ]
         final, score = arbitrate.arbitrate_all(metadata, valid, priors, 3)[0]
         self.assertEqual(final.title, "This is correct")
+
+
+class TestAuthorSimilarity(unittest.TestCase):
+    """Tests for comparison of author lists."""
+
+    def test_author_key(self):
+        """Authors are reduced to surname and initials."""
+        for author in [{'surname': 'Smith', 'givennames': 'John R.'},
+                       {'fullname': 'J. R. Smith'},
+                       {'fullname': 'Smith, J.-R.'},
+                       Author(surname='Smith', givennames='J R'),
+                       'John Robert Smith']:
+            self.assertEqual(arbitrate._author_key(author), ('smith', 'jr'))
+        self.assertEqual(arbitrate._author_key({'fullname': ''}), ('', ''))
+
+    def test_identical(self):
+        """Identical lists are identical, regardless of order or form."""
+        authors_a = [{'surname': 'Smith', 'givennames': 'J'},
+                     {'surname': 'Jones', 'givennames': 'A B'}]
+        authors_b = [{'fullname': 'A. B. Jones'}, {'fullname': 'J. Smith'}]
+        self.assertEqual(arbitrate._similarity(authors_a, authors_b), 1.0)
+
+    def test_partial(self):
+        """Missing authors and initials reduce the similarity."""
+        authors = [{'fullname': 'J. Smith'}, {'fullname': 'A. B. Jones'}]
+        self.assertEqual(
+            arbitrate._similarity(authors, authors[:1]), 0.5
+        )
+        self.assertEqual(
+            arbitrate._similarity(authors, [{'fullname': 'J. Smith'},
+                                            {'fullname': 'A. Jones'}]),
+            (1 + 0.75) / 2
+        )
+        self.assertEqual(
+            arbitrate._similarity(authors, [{'fullname': 'K. Smith'},
+                                            {'fullname': 'A. C. Jones'}]),
+            0.
+        )
+
+    def test_large_collaboration(self):
+        """Long author lists are compared without alignment."""
+        authors = [{'surname': 'Author%i' % i, 'givennames': 'A'}
+                   for i in range(2000)]
+        with mock.patch.object(arbitrate, 'align_records') as mock_align:
+            with arbitrate.SIMILARITY_CACHE.disabled():
+                self.assertEqual(
+                    arbitrate._similarity(authors, list(reversed(authors))),
+                    1.0
+                )
+            self.assertEqual(mock_align.call_count, 0)
+
+    def test_pool_author_lists(self):
+        """Author lists are pooled author by author."""
+        def _prob_valid(extractor, field):
+            return 0.5
+
+        authors = [{'fullname': 'J. Smith'}, {'fullname': 'A. B. Jones'}]
+        metadata = {
+            'cermine': Reference(authors=authors),
+            'grobid': Reference(authors=list(reversed(authors)))
+        }
+        pooled = arbitrate._pool(metadata, ['authors'], _prob_valid)
+        self.assertEqual(pooled['authors'],
+                         {arbitrate._freeze(authors): 1.0})
+
+
+class TestSimilarityCache(unittest.TestCase):
+    """Tests for :class:`.arbitrate.SimilarityCache`."""
+
+    def test_lru(self):
+        """The least recently used scores are dropped."""
+        cache = arbitrate.SimilarityCache(maxsize=2)
+        calculate = mock.MagicMock(return_value=0.5)
+        self.assertEqual(cache.get('a', calculate), 0.5)
+        cache.get('b', calculate)
+        cache.get('a', calculate)
+        cache.get('c', calculate)   # Drops 'b'.
+        cache.get('a', calculate)
+        cache.get('b', calculate)
+        self.assertEqual(calculate.call_count, 4)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 4,
+                                         'hit_rate': 2 / 6, 'size': 2,
+                                         'maxsize': 2})
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hit_rate, 0.)
+
+    def test_threads(self):
+        """The cache can be used from many threads at once."""
+        cache = arbitrate.SimilarityCache(maxsize=4)
+        errors = []
+
+        def _use() -> None:
+            rng = random.Random()
+            try:
+                for _ in range(5000):
+                    cache.get(rng.randint(0, 8), lambda: 0.5)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.hits + cache.misses, 40000)
+        self.assertLessEqual(len(cache), 4)
+
+    def test_similarity_is_cached(self):
+        """Scores for the same values are only calculated once."""
+        cache = arbitrate.SimilarityCache()
+        with mock.patch.object(arbitrate, 'SIMILARITY_CACHE', cache):
+            with mock.patch.object(arbitrate.editdistance, 'eval',
+                                   return_value=1) as mock_eval:
+                for _ in range(3):
+                    arbitrate._similarity('Phys Rev', 'Phys Rev D')
+                    arbitrate._similarity({'a': 'Phys Rev', 'b': 'x'},
+                                          {'b': 'x', 'a': 'Phys Rev'})
+                self.assertEqual(mock_eval.call_count, 3)
+                self.assertGreater(cache.hits, 0)
+
+                with cache.disabled():
+                    arbitrate._similarity('Phys Rev', 'Phys Rev D')
+                self.assertEqual(mock_eval.call_count, 4)
+
+    def test_freeze(self):
+        """Equal values have the same encoding, which can be decoded."""
+        value = {'b': [1, {'c': 'd'}], 'a': None}
+        frozen = arbitrate._freeze(value)
+        self.assertEqual(frozen, arbitrate._freeze({'a': None,
+                                                    'b': [1, {'c': 'd'}]}))
+        self.assertEqual(hash(frozen), hash(arbitrate._freeze(value)))
+        self.assertEqual(frozen.keys(), ['a', 'b'])
+        self.assertEqual(frozen.get('b')[1].get('c'), 'd')
+        self.assertEqual(arbitrate._thaw(frozen), value)
+        self.assertEqual(
+            arbitrate._thaw(arbitrate._freeze(Author(surname='Smith'))),
+            {'surname': 'Smith', 'givennames': '', 'prefix': '',
+             'suffix': '', 'fullname': ''}
+        )
+        with self.assertRaises(TypeError):
+            arbitrate._freeze(object())
+
+
+class TestValueEncoding(unittest.TestCase):
+    """Tests for pooling and selection of encoded values."""
+
+    def test_round_trip(self):
+        """Unhashable values are pooled encoded, and selected decoded."""
+        authors = [{'surname': 'Smith', 'givennames': 'J'}]
+        identifiers = [{'identifier_type': 'DOI', 'identifier': '10.1/2'}]
+        value = arbitrate._prep_value(authors)
+        self.assertIsInstance(hash(value), int)
+        self.assertEqual(arbitrate._cast_value('authors', value), authors)
+        self.assertEqual(
+            arbitrate._cast_value('identifiers',
+                                  arbitrate._prep_value(identifiers)),
+            identifiers
+        )
+        self.assertEqual(arbitrate._cast_value('year', '2011'), 2011)
+
+    def test_arbitrate_lists(self):
+        """Lists of dicts survive arbitration without a str/eval round-trip."""
+        identifiers = [{'identifier_type': 'DOI', 'identifier': '10.1/2'}]
+        metadata = [('cermine', Reference(identifiers=identifiers)),
+                    ('grobid', Reference(identifiers=identifiers))]
+        valid = [('cermine', {'identifiers': 0.9}),
+                 ('grobid', {'identifiers': 0.9})]
+        priors = [('cermine', {'__all__': 1.0}), ('grobid', {'__all__': 1.0})]
+        with mock.patch('builtins.eval') as mock_eval:
+            final, _ = arbitrate.arbitrate(metadata, valid, priors)
+            self.assertEqual(mock_eval.call_count, 0)
+        self.assertEqual(final.identifiers, identifiers)
+
+
+class TestThresholdedSimilarity(unittest.TestCase):
+    """Tests for :func:`.arbitrate._similar`."""
+
+    def test_same_as_similarity(self):
+        """The thresholded comparison agrees with the exact score."""
+        rng = random.Random(0)
+        with arbitrate.SIMILARITY_CACHE.disabled():
+            for _ in range(2000):
+                value_a = ''.join(rng.choice('ab c') for _
+                                  in range(rng.randint(0, 10)))
+                position = rng.randint(0, len(value_a))
+                value_b = rng.choice([
+                    value_a[:position] + 'x' + value_a[position + 1:],
+                    ''.join(rng.choice('abc') for _
+                            in range(rng.randint(0, 10)))
+                ])
+                score = arbitrate._similarity(value_a, value_b)
+                for threshold in [0., 0.5, 0.8, 0.9, 1.]:
+                    self.assertEqual(
+                        arbitrate._similar(value_a, value_b, threshold),
+                        score >= threshold
+                    )
+
+    def test_length_filter(self):
+        """Edit distance is not calculated if the lengths are too different."""
+        with mock.patch.object(arbitrate.editdistance, 'eval') as mock_eval:
+            self.assertFalse(arbitrate._similar('a' * 10, 'a' * 20, 0.9))
+            self.assertFalse(arbitrate._similar('abcdefghij', 'klmnopqrst',
+                                                0.9))
+            self.assertEqual(mock_eval.call_count, 0)
+
+    def test_other_types(self):
+        """Other values are compared with :func:`.arbitrate._similarity`."""
+        self.assertTrue(arbitrate._similar({'a': 'b'}, {'a': 'b'}, 0.9))
+        self.assertFalse(arbitrate._similar(1, 2, 0.9))
+
+
+class TestBatchedSimilarity(unittest.TestCase):
+    """Tests for :func:`.arbitrate._similar_batch`."""
+
+    def test_same_as_similarity(self):
+        """The batch agrees with the per-pair score."""
+        rng = random.Random(1)
+        values = [''.join(rng.choice('ab c') for _
+                          in range(rng.randint(0, 10)))
+                  for _ in range(40)]
+        values += [value[:3] + 'x' + value[4:] for value in values]
+        pairs = [(rng.choice(values), rng.choice(values))
+                 for _ in range(1000)]
+        with arbitrate.SIMILARITY_CACHE.disabled():
+            for threshold in [0., 0.5, 0.8, 0.9, 1.]:
+                results = arbitrate._similar_batch(pairs, threshold)
+                for value_a, value_b in pairs:
+                    key = arbitrate._pair_key(value_a, value_b)
+                    self.assertEqual(
+                        results[key],
+                        arbitrate._similarity(value_a, value_b) >= threshold
+                    )
+
+    def test_distinct_pairs(self):
+        """Each distinct pair is compared once, regardless of order."""
+        pairs = [('foo bar', 'foo baz'), ('foo baz', 'foo bar'),
+                 ('foo bar', 'foo baz')]
+        with arbitrate.SIMILARITY_CACHE.disabled():
+            with mock.patch.object(arbitrate.editdistance, 'eval',
+                                   return_value=1) as mock_eval:
+                results = arbitrate._similar_batch(pairs, 0.8)
+        self.assertEqual(mock_eval.call_count, 1)
+        self.assertEqual(results, {('foo bar', 'foo baz'): True})
+
+    def test_arbitrate_all(self):
+        """Batched arbitration agrees with arbitration one by one."""
+        metadata = [
+            [('cermine', Reference(title='Yep, it works', source='JHEP',
+                                   volume='12', year=2001)),
+             ('grobid', Reference(title='Yep it works', source='JHEP',
+                                  volume='21', authors=['yep']))],
+            [('cermine', Reference(title='A different title',
+                                   source='Phys. Rev. D', raw='foo')),
+             ('grobid', Reference(title='A diferent title', source='JHEP',
+                                  raw='foo.'))]
+        ]
+        valid = [[('cermine', {'title': 0.8, 'source': 0.6, 'volume': 0.5,
+                               'year': 0.9, 'raw': 0.1}),
+                  ('grobid', {'title': 0.9, 'source': 0.6, 'volume': 0.6,
+                              'authors': 0.8, 'raw': 0.2})]] * 2
+        priors = [('cermine', {'__all__': 0.8}), ('grobid', {'__all__': 0.9})]
+
+        self.assertEqual(
+            arbitrate.arbitrate_all(metadata, valid, priors, 2),
+            [arbitrate.arbitrate(metadatum, valid_metadatum, priors)
+             for metadatum, valid_metadatum in zip(metadata, valid)]
+        )
+
+
+class TestParallelArbitration(unittest.TestCase):
+    """Tests for arbitration in worker processes."""
+
+    def setUp(self):
+        """Generate some aligned references."""
+        rng = random.Random(2)
+        self.metadata, self.valid = [], []
+        for i in range(60):
+            title = ' '.join(rng.choice(['foo', 'bar', 'baz', 'bat'])
+                             for _ in range(rng.randint(1, 6)))
+            self.metadata.append([
+                ('cermine', Reference(title=title, volume=str(i))),
+                ('grobid', Reference(title=title.upper(), source='JHEP',
+                                     volume=str(i % 7)))
+            ])
+            self.valid.append([
+                ('cermine', {'title': rng.random(), 'volume': rng.random()}),
+                ('grobid', {'title': rng.random(), 'source': rng.random(),
+                            'volume': rng.random()})
+            ])
+        self.priors = [('cermine', {'__all__': 0.8}),
+                       ('grobid', {'__all__': 0.9})]
+
+    def tearDown(self):
+        """Stop any arbitration workers."""
+        arbitrate.close_worker_pool()
+
+    def test_same_as_serial(self):
+        """Parallel arbitration has the same result, in the same order."""
+        serial = arbitrate.arbitrate_all(self.metadata, self.valid,
+                                         self.priors, 2)
+        parallel = arbitrate.arbitrate_all(self.metadata, self.valid,
+                                           self.priors, 2, processes=3,
+                                           parallel_threshold=10)
+        self.assertEqual(parallel, serial)
+
+    def test_small_documents_are_serial(self):
+        """Workers are not used for documents below the threshold."""
+        with mock.patch.object(arbitrate, '_arbitrate_parallel') as parallel:
+            arbitrate.arbitrate_all(self.metadata, self.valid, self.priors, 2,
+                                    processes=3, parallel_threshold=100)
+            self.assertEqual(parallel.call_count, 0)
+
+    def test_pool_is_kept(self):
+        """The same workers arbitrate later documents."""
+        arbitrate.arbitrate_all(self.metadata, self.valid, self.priors, 2,
+                                processes=2, parallel_threshold=10)
+        pool = arbitrate._get_worker_pool(2)
+        arbitrate.arbitrate_all(self.metadata, self.valid, self.priors, 2,
+                                processes=2, parallel_threshold=10)
+        self.assertIs(arbitrate._get_worker_pool(2), pool)
+
+    def test_close_worker_pool(self):
+        """Closed workers are not used again, and are started if needed."""
+        pool = arbitrate._get_worker_pool(2)
+        arbitrate.close_worker_pool()
+        self.assertIsNone(arbitrate._worker_pool)
+        arbitrate.close_worker_pool()
+        self.assertIsNot(arbitrate._get_worker_pool(2), pool)
+
+    def test_daemonic_process(self):
+        """Workers are used from a daemonic process, like a Celery worker."""
+        context = multiprocessing.get_context('fork')
+        queue = context.SimpleQueue()
+        process = context.Process(target=_arbitrate_in_daemon, daemon=True,
+                                  args=(queue, self.metadata, self.valid,
+                                        self.priors))
+        process.start()
+        parallel_calls, arbitrated = queue.get()
+        process.join()
+        self.assertEqual(parallel_calls, 1)
+        self.assertEqual(arbitrated,
+                         arbitrate.arbitrate_all(self.metadata, self.valid,
+                                                 self.priors, 2))
+
+
+def _arbitrate_in_daemon(queue: Any, metadata: list, valid: list,
+                         priors: list) -> None:
+    """Arbitrate with worker processes, and report whether they were used."""
+    with mock.patch.object(arbitrate, '_arbitrate_parallel',
+                           wraps=arbitrate._arbitrate_parallel) as parallel:
+        arbitrated = arbitrate.arbitrate_all(metadata, valid, priors, 2,
+                                             processes=2,
+                                             parallel_threshold=10)
+    queue.put((parallel.call_count, arbitrated))
+    arbitrate.close_worker_pool()
@@ -1,8 +1,11 @@
 """Tests for :mod:`references.process.orchestrate` module."""
 
+import os
 import unittest
+from unittest import mock
 
-from references.process.merge import beliefs
+from references.domain import Author, Reference
+from references.process.merge import beliefs, bloom
 
 
 class TestBeliefs(unittest.TestCase):
@@ -52,3 +55,53 @@ class TestBeliefs(unittest.TestCase):
                 }]
             ), 0.0
         )
+
+    def test_field_values_are_not_copied(self):
+        """Values are used as they are, other than records as dicts."""
+        author = {'surname': 'Smith'}
+        reference = Reference(authors=[author, Author(surname='Jones')],
+                              title='A title')
+        values = beliefs._field_values(reference)
+        self.assertIs(values['authors'][0], author)
+        self.assertEqual(values['authors'][1]['surname'], 'Jones')
+        self.assertNotIn('doi', values)
+
+
+class TestBloomFilters(unittest.TestCase):
+    """Bloom filters are loaded on first use."""
+
+    def setUp(self):
+        """Forget any bloom filters that are already loaded."""
+        self._loaded = beliefs._bloom_filters
+        beliefs._bloom_filters = None
+
+    def tearDown(self):
+        """Restore the bloom filters."""
+        beliefs._bloom_filters = self._loaded
+
+    def test_loaded_once(self):
+        """The filters are loaded on first use, and then reused."""
+        bloom_filter = bloom.BlockedBloomFilter(1, 4)
+        bloom_filter.add('foo')
+        with mock.patch.object(beliefs, '_load_filters',
+                               return_value={'title': bloom_filter}) as load:
+            self.assertEqual(beliefs.words_title('foo bar'), 0.5)
+            self.assertEqual(beliefs.words_title('foo'), 1.0)
+            self.assertEqual(load.call_count, 1)
+
+    def test_not_available(self):
+        """If the filters cannot be loaded, values are not penalized."""
+        with mock.patch.object(beliefs, '_load_filters',
+                               side_effect=IOError('nope')):
+            self.assertEqual(beliefs.words_auth('foo bar'), 1.0)
+            self.assertEqual(beliefs.get_bloom_filters(), {})
+
+    def test_load_filters(self):
+        """The filters in ``data`` are loaded."""
+        data = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..',
+                            'data')
+        with mock.patch.dict(os.environ, {'REFLINK_DATA_DIRECTORY': data}):
+            bloom_filters = beliefs._load_filters()
+        self.assertEqual(set(bloom_filters), {'auth', 'title'})
+        self.assertEqual(beliefs.bloom_match('quantum field theory',
+                                             bloom_filters['title']), 1.0)
@@ -0,0 +1,86 @@
+"""Tests for :mod:`references.process.merge.bloom`."""
+
+import os
+import random
+import string
+import tempfile
+import unittest
+
+from references.process.merge import bloom
+
+DATA = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'data')
+
+
+def _words(rng: random.Random, N: int, length: int = 8) -> list:
+    return [''.join(rng.choice(string.ascii_lowercase)
+                    for _ in range(length)) for _ in range(N)]
+
+
+class TestBlockedBloomFilter(unittest.TestCase):
+    """Tests for :class:`.bloom.BlockedBloomFilter`."""
+
+    def test_no_false_negatives(self):
+        """Every word that was added is found."""
+        words = _words(random.Random(0), 5000)
+        bloom_filter = bloom.build(words)
+        self.assertTrue(all(bloom_filter.contains_many(words)))
+
+    def test_false_positive_rate(self):
+        """Few words that were not added are found."""
+        rng = random.Random(1)
+        bloom_filter = bloom.build(_words(rng, 5000), error_rate=0.01)
+        found = bloom_filter.contains_many(_words(rng, 5000, 9))
+        self.assertLess(sum(found) / len(found), 0.03)
+
+    def test_round_trip(self):
+        """A filter can be written and then loaded from a file."""
+        words = _words(random.Random(2), 100)
+        bloom_filter = bloom.build(words)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'words_bloom_filter_test.bytes')
+            with open(path, 'wb') as f:
+                f.write(bloom_filter.to_bytes())
+            loaded = bloom.load(path)
+            self.assertIsInstance(loaded, bloom.BlockedBloomFilter)
+            self.assertEqual(loaded.hashes, bloom_filter.hashes)
+            self.assertEqual(loaded.blocks, bloom_filter.blocks)
+            self.assertEqual(loaded.contains_many(words),
+                             bloom_filter.contains_many(words))
+
+    def test_header(self):
+        """The header is checked."""
+        data = bloom.BlockedBloomFilter(2, 3).to_bytes()
+        self.assertEqual(bloom.HEADER.unpack_from(data),
+                         (bloom.MAGIC, bloom.VERSION, 3, 2))
+        with self.assertRaises(ValueError):
+            bloom.BlockedBloomFilter.from_buffer(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            bloom.BlockedBloomFilter.from_buffer(data[:-1])
+        future = bloom.HEADER.pack(bloom.MAGIC, bloom.VERSION + 1, 3, 2)
+        with self.assertRaises(ValueError):
+            bloom.from_buffer(future + data[bloom.HEADER.size:])
+
+
+class TestLegacyBloomFilter(unittest.TestCase):
+    """Tests for :class:`.bloom.LegacyBloomFilter`."""
+
+    def test_murmur3(self):
+        """The hash matches ``pybloof``."""
+        h1, h2 = bloom.murmur3_x64_128(b'foo')
+        self.assertEqual((h1, h2), (0xe271865701f54561, 0x7eaf87e42bba7d87))
+        self.assertEqual(bloom.murmur3_x64_128(b'foo', h2 & 0xFFFFFFFF),
+                         (0xc85aed900313d378, 0x0fb9820b74e83e3d))
+
+    def test_load(self):
+        """The filters in ``data`` (written by ``pybloof``) can be read."""
+        bloom_filter = bloom.load(os.path.join(
+            DATA, 'words_bloom_filter_title.bytes'
+        ))
+        self.assertIsInstance(bloom_filter, bloom.LegacyBloomFilter)
+        self.assertEqual((bloom_filter.size, bloom_filter.hashes),
+                         (1000000, 6))
+        self.assertTrue(all(bloom_filter.contains_many(
+            ['quantum', 'field', 'theory', 'of', 'black', 'holes']
+        )))
+        found = bloom_filter.contains_many(_words(random.Random(3), 1000))
+        self.assertLess(sum(found) / len(found), 0.05)
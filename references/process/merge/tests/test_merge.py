@@ -1,8 +1,10 @@
+import copy
 import unittest
+from datetime import datetime
 from unittest import mock
 
-from references.domain import Reference
-from references.process.merge import merge_records
+from references.domain import Reference, ReferenceSet, ColumnarReferenceSet
+from references.process.merge import merge_records, IncrementalMerge
 from references.process.merge.normalize import filter_records
 
 
@@ -76,3 +78,27 @@ class TestMergeSimple(unittest.TestCase):
             self.assertTrue(bool(ref.year))
         self.assertGreaterEqual(score, 0.0)
         self.assertLessEqual(score, 1.0)
+
+    def test_incremental_merge(self):
+        """:class:`.IncrementalMerge` gives the same result."""
+        expected = merge_records(copy.deepcopy(self.simple_docs), self.priors)
+        merge = IncrementalMerge(self.priors)
+        for extractor in self.simple_docs:
+            merge.add_extraction(extractor,
+                                 copy.deepcopy(self.simple_docs[extractor]))
+        self.assertEqual(len(merge), 3)
+        self.assertEqual(merge.merged(), expected)
+        self.assertGreater(merge.cache.misses, 0)
+
+    def test_columnar(self):
+        """Extractions can be given as columns."""
+        expected = merge_records(copy.deepcopy(self.simple_docs), self.priors)
+        columnar = {
+            extractor: ColumnarReferenceSet.from_reference_set(ReferenceSet(
+                document_id='1234.5678', references=copy.deepcopy(refs),
+                version='0.1', score=0., created=datetime.now(),
+                updated=datetime.now(), extractor=extractor
+            ))
+            for extractor, refs in self.simple_docs.items()
+        }
+        self.assertEqual(merge_records(columnar, self.priors), expected)
@@ -0,0 +1,110 @@
+"""Tests for :mod:`references.process.merge.normalize`."""
+
+import random
+import re
+import unittest
+from datetime import datetime
+
+from references.domain import Reference, ReferenceSet, ColumnarReferenceSet
+from references.process.merge import normalize
+
+
+class TestFixArXivID(unittest.TestCase):
+    """Tests for :func:`.normalize._fix_arxiv_id`."""
+
+    def test_typos(self):
+        """Archive names with missing hyphens are fixed."""
+        self.assertEqual(normalize._fix_arxiv_id('hepth/9901001'),
+                         'hep-th/9901001')
+        self.assertEqual(normalize._fix_arxiv_id('mathph/0101001'),
+                         'math-ph/0101001')
+        self.assertEqual(normalize._fix_arxiv_id(['condmat/0101001',
+                                                  'astroph/0101001']),
+                         ['cond-mat/0101001', 'astro-ph/0101001'])
+
+    def test_correct(self):
+        """Correct identifiers are not changed."""
+        for value in ['hep-th/9901001', 'math/0101001', 'math-ph/0101001',
+                      'physics/0101001', '1703.03442', 'cs.DL/0101001']:
+            self.assertEqual(normalize._fix_arxiv_id(value), value)
+
+
+class TestNormalizeRecord(unittest.TestCase):
+    """Tests for :func:`.normalize.normalize_record`."""
+
+    def test_normalize_record(self):
+        """Each field is normalized."""
+        record = normalize.normalize_record(Reference(
+            title='  "A title."', source='phys. rev.', arxiv_id='hepth/99',
+            authors=[{'givennames': 'j.r.', 'fullname': 'j.r. smith'}],
+            volume='12.'
+        ))
+        self.assertEqual(record.title, 'A title')
+        self.assertEqual(record.source, 'Phys Rev')
+        self.assertEqual(record.arxiv_id, 'hep-th/99')
+        self.assertEqual(record.authors, [{'givennames': 'J R',
+                                           'fullname': 'J R Smith'}])
+        self.assertEqual(record.volume, '12.')
+        self.assertIsNone(normalize.normalize_record(Reference()).title)
+
+    def test_single_pass(self):
+        """Each normalized field is read and assigned once, and no other."""
+        accessed = []
+
+        class _Recorded(Reference):
+            __slots__ = ()
+
+            def __getattribute__(self, name):
+                if name in Reference.FIELDS:
+                    accessed.append(('get', name))
+                return super().__getattribute__(name)
+
+            def __setattr__(self, name, value):
+                if name in Reference.FIELDS:
+                    accessed.append(('set', name))
+                super().__setattr__(name, value)
+
+        record = _Recorded(title='A title.', source='phys. rev.',
+                           arxiv_id='hepth/99', volume='12.')
+        del accessed[:]
+        normalize.normalize_record(record)
+        self.assertEqual(accessed, [
+            ('get', 'authors'), ('set', 'authors'),
+            ('get', 'title'), ('set', 'title'),
+            ('get', 'source'), ('set', 'source'),
+            ('get', 'arxiv_id'), ('set', 'arxiv_id')
+        ])
+
+    def test_normalize_columns(self):
+        """Columns are normalized as each reference would be."""
+        def _references():
+            return [
+                Reference(title='  "A title."', source='phys. rev.',
+                          arxiv_id='hepth/99', volume='12.',
+                          authors=[{'givennames': 'j.r.',
+                                    'fullname': 'j.r. smith'},
+                                   {'surname': 'Jones'}]),
+                Reference(),
+                Reference(title='B.', authors=[{'givennames': 'a. b.'}])
+            ]
+        columnar = normalize.normalize_columns(
+            ColumnarReferenceSet.from_reference_set(ReferenceSet(
+                document_id='1234.5678', references=_references(),
+                version='0.1', score=0., created=datetime.now(),
+                updated=datetime.now()
+            ))
+        )
+        self.assertEqual(columnar.references(),
+                         normalize.normalize_records(_references()))
+
+    def test_leading_trailing_nonalpha(self):
+        """Non-alphanumeric characters are removed from both ends."""
+        rng = random.Random(0)
+        for _ in range(2000):
+            value = ''.join(rng.choice('aZ9 .-"\n\t') for _
+                            in range(rng.randint(0, 8)))
+            self.assertEqual(
+                normalize._remove_leading_trailing_nonalpha(value),
+                re.sub(r"[^0-9a-zA-Z]+$", "",
+                       re.sub(r"^[^0-9a-zA-Z]+", "", value))
+            )
@@ -88,3 +88,22 @@ class TestFullRecords(unittest.TestCase):
                                             "Probability never less than 0.")
                     self.assertLessEqual(value, 1.0,
                                          "Probability never more than 1.")
+
+    def test_same_as_calculate_belief(self):
+        """Validation has the same result as one reference at a time."""
+        self.assertEqual(
+            beliefs.validate(self.aligned_records),
+            [[(extractor, beliefs.calculate_belief(metadatum))
+              for extractor, metadatum in record]
+             for record in self.aligned_records]
+        )
+
+    def test_records_are_not_changed(self):
+        """The aligned references are not modified."""
+        before = [[(extractor, metadatum.to_dict())
+                   for extractor, metadatum in record]
+                  for record in self.aligned_records]
+        beliefs.validate(self.aligned_records)
+        self.assertEqual(before, [[(extractor, metadatum.to_dict())
+                                   for extractor, metadatum in record]
+                                  for record in self.aligned_records])
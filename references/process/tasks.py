@@ -5,7 +5,7 @@ from typing import List, Any
 
 from references.domain import ReferenceSet, Reference
 from references.process.extract import extract
-from references.process.merge import merge_records
+from references.process.merge import IncrementalMerge, arbitrate
 from references.services import retrieve, data_store
 from arxiv.base import logging
 from arxiv.base.globals import get_application_config
@@ -13,7 +13,7 @@ from arxiv.base.globals import get_application_config
 from celery import shared_task
 from celery.result import AsyncResult
 from celery import current_app
-from celery.signals import after_task_publish
+from celery.signals import after_task_publish, worker_process_shutdown
 
 logger = logging.getLogger(__name__)
 
@@ -58,20 +58,19 @@ def process_document(document_id: str, pdf_url: str) -> dict:
 
     logger.info('%s: retrieved PDF', document_id)
 
-    # Extract references using an array of extractors.
-    logger.debug('%s: extracting metadata', document_id)
-    extractions = extract(pdf_path, document_id)
-
-    if len(extractions) == 0:
-        _fail(document_id, RuntimeError("no extractors succeeded"),
-              "no extractors succeeded")
-
-    logger.debug('%s extraction succeeded with %i extractions: %s',
-                 document_id, len(extractions), ', '.join(extractions.keys()))
-
-    # Attempt to store raw extraction metadata for each extractor.
+    merge = IncrementalMerge(
+        alignment=config.get('ALIGNMENT_STRATEGY', 'greedy'),
+        blocking_threshold=config.get('ALIGNMENT_BLOCKING_THRESHOLD', 2000),
+        cutoff_resolution=config.get('ALIGNMENT_CUTOFF_RESOLUTION'),
+        processes=config.get('ARBITRATION_PROCESSES', 1),
+        parallel_threshold=config.get('ARBITRATION_PARALLEL_THRESHOLD', 5000)
+    )
     now = datetime.now()
-    for extractor_name, extractor_metadata in extractions.items():
+
+    def _extracted(extractor_name: str,
+                   extractor_metadata: List[Reference]) -> None:
+        # Attempt to store raw extraction metadata for each extractor, before
+        # it is normalized for merging.
         reference_set = ReferenceSet(      # type: ignore
             document_id=document_id,
             references=extractor_metadata,
@@ -86,12 +85,31 @@ def process_document(document_id: str, pdf_url: str) -> dict:
             data_store.save(reference_set)
         except IOError as e:
             logger.error('%s: could not store raw: %s', document_id, e)
+        merge.add_extraction(extractor_name, extractor_metadata)
+
+    # Extract references using an array of extractors. Each extraction is
+    # stored and added to the merge (in another thread) as soon as it is
+    # available, so that the bulk of the alignment work overlaps with the
+    # extractors that follow. Failed extractors are skipped; only an error in
+    # adding an extraction to the merge is raised.
+    logger.debug('%s: extracting metadata', document_id)
+    try:
+        extractions = extract(pdf_path, document_id, callback=_extracted)
+    except Exception as e:
+        _fail(document_id, e, "merge failed")
+
+    if len(extractions) == 0:
+        _fail(document_id, RuntimeError("no extractors succeeded"),
+              "no extractors succeeded")
+
+    logger.debug('%s extraction succeeded with %i extractions: %s',
+                 document_id, len(extractions), ', '.join(extractions.keys()))
 
     # Merge references across extractors, if more than one succeeded.
     metadata: List[Reference]
     try:
         logger.debug('%s: merging metadata', document_id)
-        metadata, score = merge_records(extractions)
+        metadata, score = merge.merged()
         logger.debug('%s: merged, contains %i records with score %f',
                      document_id, len(metadata), score)
     except Exception as e:
@@ -112,6 +130,8 @@ def process_document(document_id: str, pdf_url: str) -> dict:
     except Exception as e:
         _fail(document_id, e, "store failed")
 
+    logger.info('%s: normalization cache: %s', document_id,
+                merge.cache.stats())
     logger.info('%s: finished extracting metadata', document_id)
     if os.path.exists(pdf_path):
         os.remove(pdf_path)
@@ -133,3 +153,9 @@ def update_sent_state(sender: Any = None, headers: dict = {},
     task = current_app.tasks.get(sender)
     backend = task.backend if task else current_app.backend
     backend.store_result(headers['id'], None, "SENT")
+
+
+@worker_process_shutdown.connect
+def close_arbitration_workers(**kwargs: Any) -> None:
+    """Stop the arbitration workers of a worker process that shuts down."""
+    arbitrate.close_worker_pool()
@@ -0,0 +1,143 @@
+"""Tests for :mod:`references.process.textutil`."""
+
+import random
+import threading
+import unittest
+from unittest import mock
+
+import ftfy
+import unidecode
+
+from references.process import textutil
+
+# Characters that exercise each of the substitutions in the reference
+# implementation: punctuation, whitespace (including non-ASCII whitespace),
+# digits (including non-ASCII digits), characters that are changed by
+# ``lower()``, and bits of the ``(cid:123)`` and hyphenated line patterns.
+ALPHABET = (
+    'abcXYZ019 \t\n\r\x0b\x0c-_.,;:!?()[]{}/\\\'"@#$%^&*+=<>|~`'
+    '\xa0 　\x1c\x85éÉİKß١०'
+    '²Ⅷ\ud800\U0001d400中'
+)
+FRAGMENTS = ['(cid:12)', '(cid:١)', '(CID:3)', '-\n', '- \n  ', '-\t\n',
+             ' 1999 ', 'a1', '1a', 'UNK']
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 12)):
+        if rng.random() < 0.2:
+            parts.append(rng.choice(FRAGMENTS))
+        else:
+            parts.append(''.join(rng.choice(ALPHABET)
+                                 for _ in range(rng.randint(0, 6))))
+    return ''.join(parts)
+
+
+class TestCleanText(unittest.TestCase):
+    """Tests for :func:`.textutil.clean_text`."""
+
+    def test_same_as_regex(self):
+        """Output is identical to the reference implementation."""
+        rng = random.Random(0)
+        for _ in range(20000):
+            text = _random_text(rng)
+            for numok in (False, True):
+                self.assertEqual(
+                    textutil._clean_text(text, numok=numok),
+                    textutil._clean_text_regex(text, numok=numok),
+                    'Output differs for %r (numok=%s)' % (text, numok)
+                )
+
+    def test_clean_text(self):
+        """Text is lowercased, and punctuation and numbers are removed."""
+        self.assertEqual(textutil.clean_text('Phys. Rev. D 12, (cid:3) hy-\n'
+                                             'phen'),
+                         'phys rev d UNK hyphen')
+        self.assertEqual(textutil.clean_text('Phys. Rev. D 12', numok=True),
+                         'phys rev d 12')
+
+
+class TestNormalizationCache(unittest.TestCase):
+    """Tests for :class:`.textutil.NormalizationCache`."""
+
+    def test_hits_and_misses(self):
+        """Results are cached, and hits and misses are counted."""
+        with textutil.normalization_scope() as cache:
+            self.assertEqual(textutil.clean_text('Foo, Bar 12'), 'foo bar')
+            self.assertEqual(textutil.clean_text('Foo, Bar 12'), 'foo bar')
+            self.assertEqual(textutil.clean_text('Foo, Bar 12', numok=True),
+                             'foo bar 12')
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertIs(textutil.get_normalization_cache(), cache)
+        self.assertIs(textutil.get_normalization_cache(),
+                      textutil.NORMALIZATION_CACHE)
+
+    def test_threads(self):
+        """A scope only applies to the thread in which it is used."""
+        seen = []
+        with textutil.normalization_scope() as cache:
+            thread = threading.Thread(target=lambda: seen.append(
+                textutil.get_normalization_cache()))
+            thread.start()
+            thread.join()
+            self.assertIs(textutil.get_normalization_cache(), cache)
+        self.assertEqual(seen, [textutil.NORMALIZATION_CACHE])
+
+        merge_cache = textutil.NormalizationCache()
+        with textutil.normalization_scope(cache=merge_cache) as cache:
+            textutil.clean_text('Foo, Bar 12')
+        self.assertIs(cache, merge_cache)
+        self.assertEqual(merge_cache.misses, 1)
+
+    def test_shared(self):
+        """A cache can be used by many threads at once."""
+        cache = textutil.NormalizationCache(maxsize=4)
+        errors = []
+
+        def _use() -> None:
+            rng = random.Random()
+            try:
+                for _ in range(5000):
+                    cache.get(rng.randint(0, 8), lambda: 'foo')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.hits + cache.misses, 40000)
+        self.assertLessEqual(len(cache), 4)
+
+    def test_bounded(self):
+        """The least recently used values are dropped."""
+        with textutil.normalization_scope(maxsize=2) as cache:
+            for txt in ['a', 'b', 'a', 'c']:
+                textutil.clean_text(txt)
+            self.assertEqual(len(cache), 2)
+            textutil.clean_text('b')
+            self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_ascii_fast_path(self):
+        """Plain ASCII text is not passed to ftfy or unidecode."""
+        with mock.patch.object(textutil.ftfy, 'fix_text') as fix_text:
+            with mock.patch.object(textutil.unidecode, 'unidecode') as decode:
+                self.assertEqual(textutil.clean_blob('Foo, "Bar"\nBaz'),
+                                 'foo bar\nbaz')
+                self.assertEqual(fix_text.call_count, 0)
+                self.assertEqual(decode.call_count, 0)
+
+    def test_same_as_ftfy_and_unidecode(self):
+        """The fast paths do not change the result."""
+        rng = random.Random(1)
+        alphabet = ALPHABET.replace('\ud800', '') + '&amp;&lt;\x07\x1b'
+        for _ in range(2000):
+            txt = ''.join(rng.choice(alphabet)
+                          for _ in range(rng.randint(0, 20)))
+            self.assertEqual(textutil.fix_text(txt),
+                             ftfy.fix_text(txt, normalization='NFKC'))
+            self.assertEqual(textutil.to_ascii(txt),
+                             unidecode.unidecode(txt))
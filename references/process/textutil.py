@@ -1,22 +1,223 @@
 """Text cleanup utilities."""
 
 import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Hashable, Iterator, Optional
+
 import ftfy
 import unidecode
 
+from arxiv.base import logging
+
+logger = logging.getLogger(__name__)
+
 punctuation_pat = re.compile(r"""([!"#$%&\'()*+,-./:;<=>?@[\\\]^_`{|}~])""")
 hyphenline_pat = re.compile(r"-\s*\n\s*")
 multiwhite_pat = re.compile(r"\s+")
 cid_pat = re.compile(r"\(cid:\d+\)")
 nonlet = re.compile(r"([^A-Za-z0-9 ])")
 purenum = re.compile(r"\b[0-9]+\b")
+ascii_pat = re.compile(r"[\x00-\x7f]*\Z")
+# ASCII that ftfy leaves alone: no control characters (other than tab and
+# newline), and no HTML entities.
+plain_pat = re.compile(r"[\t\n\x20-\x25\x27-\x7e]*\Z")
+
+
+class NormalizationCache(object):
+    """
+    Bounded, least-recently-used cache of normalized strings.
+
+    The same raw strings, titles and names are normalized again and again
+    while a document is merged, so results are kept for the most recently
+    used ``maxsize`` inputs. The cache may be used from more than one thread
+    (e.g. :const:`.NORMALIZATION_CACHE`, by requests that need the
+    identifier of a reference); values are calculated outside of its lock.
+    """
+
+    def __init__(self, maxsize: int = 50000) -> None:
+        """Set up an empty cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of cached values."""
+        return len(self._values)
+
+    def get(self, key: Hashable, calculate: Callable[[], str]) -> str:
+        """Get the value for ``key``, calculating it if it is not cached."""
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                self._values.move_to_end(key)
+                cached: str = self._values[key]
+                return cached
+        value = calculate()
+        with self._lock:
+            self.misses += 1
+            self._values[key] = value
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+        return value
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self) -> Dict[str, float]:
+        """Get the hits, misses, hit rate, and current size of the cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate, 'size': len(self),
+                'maxsize': self.maxsize}
+
+    def clear(self) -> None:
+        """Remove all cached values, and reset the statistics."""
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+NORMALIZATION_CACHE = NormalizationCache()
+"""Cache used outside of any :func:`.normalization_scope`."""
+
+_local = threading.local()
+"""The cache of the innermost scope (if any) in each thread."""
+
+
+def get_normalization_cache() -> NormalizationCache:
+    """Get the cache that is currently in use in this thread."""
+    cache: NormalizationCache = getattr(_local, 'cache', NORMALIZATION_CACHE)
+    return cache
+
+
+@contextmanager
+def normalization_scope(maxsize: int = 50000,
+                        cache: Optional[NormalizationCache] = None) \
+        -> Iterator[NormalizationCache]:
+    """
+    Use a fresh normalization cache (or ``cache``) within this context.
+
+    E.g. for the merge of a single document, so that its strings are not
+    kept once it is done. The scope only applies to the current thread, so
+    merges in other threads keep their own caches. Outside of any scope,
+    :const:`.NORMALIZATION_CACHE` is used.
+    """
+    previous = get_normalization_cache()
+    current = cache if cache is not None else NormalizationCache(maxsize)
+    _local.cache = current
+    try:
+        yield current
+    finally:
+        if cache is None:
+            logger.debug('Normalization cache: %s', current.stats())
+        _local.cache = previous
+
+
+def _cached(func: Callable[..., str]) -> Callable[..., str]:
+    """Cache the results of a normalization function."""
+    @wraps(func)
+    def _normalize_cached(txt: str, *args: object) -> str:
+        return get_normalization_cache().get((func.__name__, txt) + args,
+                                             lambda: func(txt, *args))
+    return _normalize_cached
+
+
+def is_ascii(txt: str) -> bool:
+    """Determine whether ``txt`` contains only ASCII characters."""
+    return ascii_pat.match(txt) is not None
+
+
+def to_ascii(txt: str) -> str:
+    """Transliterate ``txt`` to ASCII (see :func:`unidecode.unidecode`)."""
+    if is_ascii(txt):
+        return txt
+    return _unidecode(txt)
+
+
+@_cached
+def _unidecode(txt: str) -> str:
+    return unidecode.unidecode(txt)
+
+
+def fix_text(txt: str) -> str:
+    """Fix encoding problems in ``txt`` (see :func:`ftfy.fix_text`)."""
+    if plain_pat.match(txt) is not None:
+        return txt
+    return _fix_text(txt)
+
+
+@_cached
+def _fix_text(txt: str) -> str:
+    return ftfy.fix_text(txt, normalization='NFKC')
+
+
+class _CleanTable(dict):
+    """
+    Translation table that keeps ASCII letters, numbers and spaces.
+
+    Every other character becomes a space. ASCII characters are looked up in
+    the table itself; anything else is handled by :meth:`.__missing__`.
+    """
+
+    def __missing__(self, key: int) -> str:
+        return ' '
+
+
+clean_table = _CleanTable(
+    (i, chr(i) if nonlet.match(chr(i)) is None else ' ') for i in range(128)
+)
 
 
 def clean_text(txt: str, numok: bool = False) -> str:
     """
     Normalize a set of text so that it can be compared with different sources.
 
-    Potentially with different encodings and varying whitespace etc.
+    Potentially with different encodings and varying whitespace etc. See
+    :func:`._clean_text`; results are kept in the normalization cache.
+    """
+    return _clean_text_cached(txt, numok)
+
+
+@_cached
+def _clean_text_cached(txt: str, numok: bool) -> str:
+    return _clean_text(txt, numok)
+
+
+def _clean_text(txt: str, numok: bool = False) -> str:
+    """
+    Uncached implementation of :func:`.clean_text`.
+
+    Equivalent to :func:`._clean_text_regex`, but the character-level
+    substitutions are made in a single pass with :const:`.clean_table`, and
+    the patterns that involve more than one character are only applied if the
+    text could match them.
+    """
+    txt = txt.lower()
+    if '(cid:' in txt:
+        txt = cid_pat.sub(" UNK ", txt)
+    if '\n' in txt and '-' in txt:
+        txt = hyphenline_pat.sub("", txt)
+    # Only ASCII letters, numbers and spaces remain.
+    words = txt.translate(clean_table).split()
+    if not numok:
+        words = [word for word in words if not word.isdigit()]
+    return ' '.join(words)
+
+
+def _clean_text_regex(txt: str, numok: bool = False) -> str:
+    """
+    Reference implementation of :func:`._clean_text`, using only regexes.
+
+    Kept so that :func:`._clean_text` can be tested (and benchmarked) against
+    it.
     """
     txt = txt.lower()
     txt = cid_pat.sub(" UNK ", txt)
@@ -39,8 +240,8 @@ def clean_blob(blob: str, numok: bool = False) -> str:
 
     lines = blob.split('\n')
     for line in lines:
-        txt = ftfy.fix_text(line, normalization='NFKC')
-        txt = unidecode.unidecode(txt)
+        txt = fix_text(line)
+        txt = to_ascii(txt)
         txt = clean_text(txt, numok=numok)
         output.append(txt)
     return '\n'.join(output)
@@ -157,21 +157,24 @@ def cxml_format_document(root: ET.Element) -> List[Reference]:
     #     'doi': ''
     # }
 
-    references = []
-    for refroot in root.iter(tag='ref'):
-        reference = {
-            key: func(refroot) for key, func in reference_constructor.items()
-        }
-
-        # add regex extracted information to the metadata (not CERMINE's)
-        rawline = reference.get('raw', '') or ''
-        partial = regex_identifiers.extract_identifiers(rawline)
+    metadata = [
+        {key: func(refroot) for key, func in reference_constructor.items()}
+        for refroot in root.iter(tag='ref')
+    ]
+
+    # add regex extracted information to the metadata (not CERMINE's), from
+    #  all of the raw lines at once
+    partials = regex_identifiers.extract_identifiers_batch([
+        reference.get('raw', '') or '' for reference in metadata
+    ])
 
+    references = []
+    for reference, partial in zip(metadata, partials):
         reference['identifiers'] = [
             Identifier(**ident)     # type: ignore
             for ident in reference.get('identifiers', [])
         ]
-        reference['identifiers'] += partial.identifiers
+        reference['identifiers'] += partial.get('identifiers', [])
         references.append(Reference(**reference))  # type: ignore
 
     return references
@@ -1,16 +1,20 @@
 """Persistance for extracted references, using Redis."""
 
 import json
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional, Union
 from functools import wraps
 
 import redis
 
 from arxiv.base.globals import get_application_config, get_application_global
-from references.domain import Reference, ReferenceSet
+from references.domain import Reference, ReferenceSet, \
+    ColumnarReferenceSet
 from .exceptions import CommunicationError, ReferencesNotFound
 
 
+AnyReferenceSet = Union[ReferenceSet, ColumnarReferenceSet]
+
+
 class ReferenceStoreSession(object):
     """Manages a connection to Redis."""
 
@@ -18,36 +22,94 @@ class ReferenceStoreSession(object):
         """Open the connection to Redis."""
         self.r = redis.StrictRedis(host=host, port=port, db=database)
 
-    def _version(self, rset: ReferenceSet) -> str:
+    def _version(self, rset: AnyReferenceSet) -> str:
         """Generate a key using document ID, version, and extrator."""
         return f"{rset.document_id}_{rset.version}_{rset.extractor}"
 
-    def _extractor(self, rset: ReferenceSet) -> str:
+    def _extractor(self, rset: AnyReferenceSet) -> str:
         """Generate an indexing key based on document ID and extractor."""
         return f"{rset.document_id}_{rset.extractor}"
 
-    def _index(self, rset: ReferenceSet) -> None:
+    def _references(self, key: str) -> str:
+        """Generate the key of the references of a versioned extraction."""
+        return f"{key}:references"
+
+    def _index(self, rset: AnyReferenceSet, r: Any = None) -> None:
         """Update document indices."""
         # We're using a sorted sets as a kind of index. For each
         # document-extraction key, we index the versioned extractions using
         # the version number itself (major and minor parts) as the sort score.
         version = float('.'.join(rset.version.split('.')[:2]))
-        self.r.zadd(self._extractor(rset), version, self._version(rset))
+        (r or self.r).zadd(self._extractor(rset), version,
+                           self._version(rset))
+
+    def _latest(self, document_id: str, extractor: str) -> str:
+        """Get the key of the latest version of an extraction."""
+        keys = self.r.zrangebyscore(f"{document_id}_{extractor}",
+                                    '-inf', '+inf')
+        if not keys:
+            raise ReferencesNotFound('No such extraction')
+        key = keys[-1]
+        return key.decode('utf-8') if isinstance(key, bytes) else key
+
+    def save(self, reference_set: AnyReferenceSet) -> None:
+        """
+        Store a :class:`.ReferenceSet`.
 
-    def save(self, reference_set: ReferenceSet) -> None:
-        """Store a :class:`.ReferenceSet`."""
+        A :class:`.ColumnarReferenceSet` is stored as columns, as it is. Each
+        reference is also stored on its own, in a hash keyed by its
+        identifier, so that it can be loaded without the rest of the set (see
+        :meth:`.load_reference`).
+        """
+        key = self._version(reference_set)
+        if isinstance(reference_set, ColumnarReferenceSet):
+            # No need to make each reference just to store it.
+            references = [reference_set.reference_dict(i)
+                          for i in range(len(reference_set))]
+        else:
+            references = [reference.to_dict()
+                          for reference in reference_set.references]
+        stored: Dict[str, str] = {}
+        for reference in references:
+            # As when the set is searched, the first reference with an
+            # identifier wins.
+            if reference['identifier'] not in stored:
+                stored[reference['identifier']] = json.dumps(reference)
         try:
-            self.r.set(self._version(reference_set), json.dumps(reference_set))
+            pipe = self.r.pipeline()
+            pipe.set(key, json.dumps(reference_set.to_dict()))
+            pipe.delete(self._references(key))
+            if stored:
+                pipe.hmset(self._references(key), stored)
+            self._index(reference_set, pipe)
+            pipe.execute()
         except redis.exceptions.ConnectionError as e:
             raise CommunicationError('Failed to save references') from e
 
     def load(self, document_id: str, extractor: str = 'combined',
              version: str = 'latest') -> ReferenceSet:
         """Load a class:`.ReferenceSet` from the data store."""
+        data = self._load(document_id, extractor, version)
+        if 'columns' in data:
+            return ColumnarReferenceSet.from_dict(data).to_reference_set()
+        return ReferenceSet.from_dict(data)
+
+    def load_columnar(self, document_id: str, extractor: str = 'combined',
+                      version: str = 'latest') -> ColumnarReferenceSet:
+        """
+        Load a :class:`.ColumnarReferenceSet` from the data store.
+
+        No :class:`.Reference` is made, however the set was stored.
+        """
+        return ColumnarReferenceSet.from_dict(
+            self._load(document_id, extractor, version)
+        )
+
+    def _load(self, document_id: str, extractor: str, version: str) -> dict:
+        """Load the data for a reference set."""
         try:
             if version == 'latest':
-                _extractor = f"{document_id}_{extractor}"
-                key = self.r.zrangebyscore(_extractor, '-inf', '+inf')[-1]
+                key = self._latest(document_id, extractor)
             else:
                 key = f"{document_id}_{version}_{extractor}"
             data = self.r.get(key)
@@ -55,7 +117,42 @@ class ReferenceStoreSession(object):
             raise CommunicationError('Failed to load references') from e
         if not data:
             raise ReferencesNotFound('No such extraction')
-        return ReferenceSet(**json.loads(data))     # type: ignore
+        decoded: dict = json.loads(data)
+        return decoded
+
+    def load_reference(self, document_id: str, ref_id: str,
+                       extractor: str = 'combined',
+                       version: str = 'latest') -> Reference:
+        """
+        Load a single :class:`.Reference` from the data store.
+
+        Only that reference is fetched, unless the extraction was stored
+        without a hash of its references (i.e. before they were stored
+        individually), in which case the whole set is loaded and searched.
+        """
+        try:
+            if version == 'latest':
+                key = self._latest(document_id, extractor)
+            else:
+                key = f"{document_id}_{version}_{extractor}"
+            data = self.r.hget(self._references(key), ref_id)
+            if not data and not self.r.exists(self._references(key)):
+                return self._find_reference(document_id, ref_id, extractor,
+                                            version)
+        except redis.exceptions.ConnectionError as e:
+            raise CommunicationError('Failed to load references') from e
+        if not data:
+            raise ReferencesNotFound('No such reference')
+        return Reference.from_dict(json.loads(data))
+
+    def _find_reference(self, document_id: str, ref_id: str, extractor: str,
+                        version: str) -> Reference:
+        """Load a whole :class:`.ReferenceSet`, and find a reference in it."""
+        reference_set = self.load(document_id, extractor, version)
+        for reference in reference_set.references:
+            if reference.identifier == ref_id:
+                return reference
+        raise ReferencesNotFound('No such reference')
 
 
 def init_app(app: object) -> None:
@@ -105,13 +202,13 @@ def current_session() -> ReferenceStoreSession:
 
 
 @wraps(ReferenceStoreSession.save)
-def save(references: ReferenceSet) -> None:
+def save(references: AnyReferenceSet) -> None:
     """
     Store extracted references for a document.
 
     Parameters
     ----------
-    references : :class:`.ReferenceSet`
+    references : :class:`.ReferenceSet` or :class:`.ColumnarReferenceSet`
 
     """
     session = current_session()
@@ -138,3 +235,49 @@ def load(document_id: str, extractor: str = 'combined',
 
     """
     return current_session().load(document_id, extractor=extractor)
+
+
+@wraps(ReferenceStoreSession.load_columnar)
+def load_columnar(document_id: str, extractor: str = 'combined',
+                  version: str = 'latest') -> ColumnarReferenceSet:
+    """
+    Retrieve extracted references, as columns.
+
+    Parameters
+    ----------
+    document_id : str
+        arXiv paper ID (with version affix).
+    extractor : str
+        If provided, load the raw extraction for a particular extractor.
+
+    Returns
+    -------
+    :class:`.ColumnarReferenceSet`
+
+    """
+    return current_session().load_columnar(document_id, extractor=extractor)
+
+
+@wraps(ReferenceStoreSession.load_reference)
+def load_reference(document_id: str, ref_id: str,
+                   extractor: str = 'combined') -> Reference:
+    """
+    Retrieve a single extracted reference.
+
+    Parameters
+    ----------
+    document_id : str
+        arXiv paper ID (with version affix).
+    ref_id : str
+        Unique identifier of the reference (see :attr:`.Reference.identifier`).
+    extractor : str
+        If provided, load the reference from the raw extraction for a
+        particular extractor.
+
+    Returns
+    -------
+    :class:`.Reference`
+
+    """
+    return current_session().load_reference(document_id, ref_id,
+                                            extractor=extractor)
@@ -0,0 +1,152 @@
+"""Tests for :mod:`references.services.data_store`."""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from references.domain import Reference, ReferenceSet, ColumnarReferenceSet
+from references.services import data_store
+
+
+class FakeRedis(object):
+    """Just enough of :class:`redis.StrictRedis` (2.x) to store references."""
+
+    def __init__(self, *args, **kwargs):
+        """Start empty."""
+        self.data = {}
+        self.calls = []
+
+    def __getattribute__(self, name):
+        """Record the commands that are used."""
+        if not name.startswith('_') and name not in ('data', 'calls'):
+            object.__getattribute__(self, 'calls').append(name)
+        return object.__getattribute__(self, name)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def set(self, key, value):
+        self.data[key] = value.encode('utf-8')
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def exists(self, key):
+        return key in self.data
+
+    def hmset(self, key, mapping):
+        self.data[key] = {field: value.encode('utf-8')
+                          for field, value in mapping.items()}
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def zadd(self, key, score, member):
+        self.data.setdefault(key, {})[member] = score
+
+    def zrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        return [member.encode('utf-8')
+                for member in sorted(members, key=members.get)]
+
+
+class TestReferenceStoreSession(unittest.TestCase):
+    """Tests for :class:`.data_store.ReferenceStoreSession`."""
+
+    def setUp(self):
+        """Given a reference set..."""
+        self.reference_set = ReferenceSet(
+            document_id='1234.5678v1',
+            references=[Reference(raw='foo', title='Bar',
+                                  authors=[{'surname': 'Baz'}]),
+                        Reference(raw='bat', title='Baz')],
+            version='0.1',
+            score=0.9,
+            created=datetime.now(),
+            updated=datetime.now()
+        )
+        with mock.patch.object(data_store.redis, 'StrictRedis', FakeRedis):
+            self.session = data_store.ReferenceStoreSession('localhost', 6379,
+                                                            1)
+
+    def test_save_and_load(self):
+        """A saved reference set can be loaded again."""
+        self.session.save(self.reference_set)
+        self.assertEqual(self.session.load('1234.5678v1', version='0.1'),
+                         self.reference_set)
+        self.assertEqual(self.session.load('1234.5678v1'), self.reference_set)
+
+    def test_latest(self):
+        """The latest version is loaded by default."""
+        self.session.save(self.reference_set)
+        self.reference_set.version = '0.2'
+        self.session.save(self.reference_set)
+        self.assertEqual(self.session.load('1234.5678v1').version, '0.2')
+        with self.assertRaises(data_store.ReferencesNotFound):
+            self.session.load('1234.5678v2')
+
+    def test_columnar(self):
+        """A reference set can be stored and loaded as columns."""
+        columnar = ColumnarReferenceSet.from_reference_set(self.reference_set)
+        self.session.save(columnar)
+        self.assertEqual(self.session.load('1234.5678v1', version='0.1'),
+                         self.reference_set)
+        self.assertEqual(
+            self.session.load_columnar('1234.5678v1', version='0.1'),
+            columnar
+        )
+
+        self.session.save(self.reference_set)
+        self.assertEqual(
+            self.session.load_columnar('1234.5678v1', version='0.1'),
+            columnar
+        )
+
+    def test_load_reference(self):
+        """A single reference is loaded from the hash of references."""
+        self.session.save(self.reference_set)
+        expected = self.reference_set.references[1]
+        self.session.r.calls.clear()
+        self.assertEqual(
+            self.session.load_reference('1234.5678v1', expected.identifier),
+            expected
+        )
+        self.assertNotIn('get', self.session.r.calls)
+        with self.assertRaises(data_store.ReferencesNotFound):
+            self.session.load_reference('1234.5678v1', 'nope')
+
+    def test_load_reference_from_columns(self):
+        """References in a columnar set are stored individually too."""
+        self.session.save(
+            ColumnarReferenceSet.from_reference_set(self.reference_set)
+        )
+        expected = self.reference_set.references[0]
+        self.assertEqual(
+            self.session.load_reference('1234.5678v1', expected.identifier),
+            expected
+        )
+
+    def test_save_columnar_without_references(self):
+        """No reference is made to store a columnar set."""
+        columnar = ColumnarReferenceSet.from_reference_set(self.reference_set)
+        with mock.patch.object(Reference, '__init__') as init:
+            self.session.save(columnar)
+            self.assertEqual(init.call_count, 0)
+
+    def test_load_reference_without_hash(self):
+        """Sets stored before references were stored individually work."""
+        self.session.save(self.reference_set)
+        self.session.r.delete('1234.5678v1_0.1_combined:references')
+        expected = self.reference_set.references[1]
+        self.assertEqual(
+            self.session.load_reference('1234.5678v1', expected.identifier),
+            expected
+        )
+        with self.assertRaises(data_store.ReferencesNotFound):
+            self.session.load_reference('1234.5678v1', 'nope')
@@ -0,0 +1,205 @@
+"""Tests for :mod:`references.domain`."""
+
+import copy
+import json
+import pickle
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from references.domain import Reference, ReferenceSet, Author, Identifier, \
+    ColumnarReferenceSet
+
+
+def _reference(**data) -> Reference:
+    data.setdefault('raw', 'J. Smith, A title, Phys. Rev. D 12, 34 (2010)')
+    return Reference(
+        title='A title', authors=[Author(surname='Smith', givennames='J')],
+        source='Phys. Rev. D', volume='12', pages='34', year='2010',
+        identifiers=[Identifier('ISBN', '0-306-40615-2')], **data
+    )
+
+
+class TestReference(unittest.TestCase):
+    """Tests for :class:`.Reference`."""
+
+    def test_repr(self):
+        """The representation is that of a dataclass."""
+        self.assertEqual(
+            repr(Reference(raw='foo', authors=[Author(surname='Bar')])),
+            "Reference(title=None, raw='foo', arxiv_id=None, authors=["
+            "Author(surname='Bar', givennames='', prefix='', suffix='', "
+            "fullname='')], reftype='article', doi=None, volume=None, "
+            "issue=None, pages=None, source=None, year=None, identifiers=[], "
+            "identifier='Zm9v', score=0.0)"
+        )
+
+    def test_no_dict(self):
+        """Fields are kept in slots."""
+        for obj in [Reference(), Author(), Identifier('ISBN', '1')]:
+            self.assertFalse(hasattr(obj, '__dict__'))
+            with self.assertRaises(AttributeError):
+                obj.foo = 'bar'
+
+    def test_identifier(self):
+        """The identifier is based on the raw reference at creation."""
+        reference = Reference(raw='foo', identifier='ignored')
+        reference.raw = 'bar'
+        self.assertEqual(reference.identifier, 'Zm9v')
+        reference.identifier = 'baz'
+        self.assertEqual(reference.identifier, 'baz')
+
+    def test_equality(self):
+        """References with the same fields are equal."""
+        self.assertEqual(_reference(), _reference())
+        self.assertNotEqual(_reference(), _reference(doi='10.1000/1'))
+        self.assertNotEqual(_reference(), _reference().to_dict())
+
+    def test_to_dict(self):
+        """Empty fields are left out, and nested objects become dicts."""
+        data = _reference().to_dict()
+        self.assertNotIn('doi', data)
+        self.assertEqual(data['authors'], [{
+            'surname': 'Smith', 'givennames': 'J', 'prefix': '',
+            'suffix': '', 'fullname': ''
+        }])
+        self.assertEqual(data['identifiers'], [
+            {'identifier_type': 'ISBN', 'identifier': '0-306-40615-2'}
+        ])
+
+    def test_to_dict_copies(self):
+        """Changing the dict does not change the reference."""
+        reference = Reference(authors=[{'surname': 'Smith'}])
+        reference.to_dict()['authors'][0]['surname'] = 'Jones'
+        self.assertEqual(reference.authors, [{'surname': 'Smith'}])
+
+    def test_copy_and_pickle(self):
+        """References can be copied and pickled."""
+        reference = _reference()
+        self.assertEqual(copy.deepcopy(reference), reference)
+        self.assertEqual(pickle.loads(pickle.dumps(reference)), reference)
+
+
+class TestReferenceSet(unittest.TestCase):
+    """Tests for :class:`.ReferenceSet`."""
+
+    def setUp(self):
+        """Given a reference set..."""
+        self.reference_set = ReferenceSet(
+            document_id='1234.5678v1',
+            references=[_reference(), Reference(raw='foo', doi='10.1/2')],
+            version='0.1',
+            score=0.9,
+            created=datetime(2018, 1, 2, 3, 4, 5, 6),
+            updated=datetime(2018, 1, 2, 3, 4, 5),
+            extractors=['cermine', 'grobid']
+        )
+
+    def test_to_dict(self):
+        """Empty fields of references are included."""
+        data = self.reference_set.to_dict()
+        self.assertEqual(data['created'], '2018-01-02T03:04:05.000006')
+        self.assertIsNone(data['references'][1]['title'])
+        self.assertEqual(data['references'][1]['identifier'], 'Zm9v')
+
+    def test_round_trip(self):
+        """A reference set survives serialization as JSON."""
+        data = json.loads(json.dumps(self.reference_set.to_dict()))
+        loaded = ReferenceSet.from_dict(data)
+        self.assertEqual(loaded.to_dict(), self.reference_set.to_dict())
+        self.assertEqual(loaded.created, self.reference_set.created)
+        self.assertEqual(loaded.updated, self.reference_set.updated)
+        self.assertEqual(loaded, self.reference_set)
+
+    def test_partial_authors(self):
+        """Authors that are not :class:`.Author` are kept as they are."""
+        self.reference_set.references[1].authors = [{'surname': 'Smith'}]
+        loaded = ReferenceSet.from_dict(self.reference_set.to_dict())
+        self.assertEqual(loaded.references[1].authors, [{'surname': 'Smith'}])
+        self.assertIsInstance(loaded.references[0].authors[0], Author)
+
+    def test_stored_identifier(self):
+        """The stored identifier is used as it is."""
+        data = self.reference_set.to_dict()
+        data['references'][0]['identifier'] = 'foo'
+        loaded = ReferenceSet.from_dict(data)
+        self.assertEqual(loaded.references[0].identifier, 'foo')
+        with mock.patch('references.domain.to_ascii') as to_ascii:
+            ReferenceSet.from_dict(self.reference_set.to_dict())
+            self.assertEqual(to_ascii.call_count, 0)
+
+
+class TestColumnarReferenceSet(unittest.TestCase):
+    """Tests for :class:`.ColumnarReferenceSet`."""
+
+    def setUp(self):
+        """Given a reference set..."""
+        self.reference_set = ReferenceSet(
+            document_id='1234.5678v1',
+            references=[
+                _reference(),
+                Reference(raw='foo', doi='10.1/2', source='Phys. Rev. D',
+                          authors=[{'surname': 'Jones'}]),
+                Reference()
+            ],
+            version='0.1',
+            score=0.9,
+            created=datetime(2018, 1, 2, 3, 4, 5, 6),
+            updated=datetime(2018, 1, 2, 3, 4, 5),
+            extractors=['cermine', 'grobid']
+        )
+        self.columnar = ColumnarReferenceSet.from_reference_set(
+            self.reference_set
+        )
+
+    def test_columns(self):
+        """Each field is a column, and authors are in a flat table."""
+        self.assertEqual(len(self.columnar), 3)
+        self.assertEqual(self.columnar.column('doi'), [None, '10.1/2', None])
+        self.assertEqual(self.columnar.author_offsets, [0, 1, 2, 2])
+        self.assertEqual(self.columnar.column('authors'), [
+            [Author(surname='Smith', givennames='J')],
+            [{'surname': 'Jones'}],
+            []
+        ])
+        self.assertEqual(self.columnar.identifiers_of(0),
+                         [Identifier('ISBN', '0-306-40615-2')])
+
+    def test_round_trip(self):
+        """Nothing is lost in conversion to columns and back."""
+        self.assertEqual(self.columnar.to_reference_set(), self.reference_set)
+
+    def test_reference_dict(self):
+        """The dict of a reference is made without the reference."""
+        expected = [reference.to_dict()
+                    for reference in self.reference_set.references]
+        with mock.patch.object(Reference, '__init__') as init:
+            self.assertEqual([self.columnar.reference_dict(i)
+                              for i in range(len(self.columnar))], expected)
+            self.assertEqual(init.call_count, 0)
+
+        self.columnar.columns['identifier'][1] = None
+        self.assertEqual(self.columnar.reference_dict(1)['identifier'],
+                         'Zm9v')
+
+    def test_json(self):
+        """The columns survive serialization as JSON."""
+        data = json.loads(json.dumps(self.columnar.to_dict()))
+        loaded = ColumnarReferenceSet.from_dict(data)
+        self.assertEqual(loaded, self.columnar)
+        self.assertEqual(loaded.to_reference_set(), self.reference_set)
+
+    def test_from_rows(self):
+        """Columns can be read from a stored :class:`.ReferenceSet`."""
+        data = json.loads(json.dumps(self.reference_set.to_dict()))
+        with mock.patch.object(Reference, '__init__') as init:
+            loaded = ColumnarReferenceSet.from_dict(data)
+            self.assertEqual(init.call_count, 0)
+        self.assertEqual(loaded, self.columnar)
+
+    def test_strings(self):
+        """Equal strings are shared."""
+        data = json.loads(json.dumps(self.columnar.to_dict()))
+        sources = ColumnarReferenceSet.from_dict(data).column('source')
+        self.assertEqual(sources[0], sources[1])
+        self.assertIs(sources[0], sources[1])
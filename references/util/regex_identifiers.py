@@ -1,11 +1,15 @@
 """Tools for extracting document identifiers from bibliographic references."""
 
-from typing import List, Dict, Any
+from bisect import bisect_right
+from typing import List, Dict, Any, Sequence
 import regex as re
 
+from arxiv.base import logging
 from references.domain import Reference, Author, Identifier
 from .regex_arxiv import REGEX_ARXIV_FLEXIBLE
 
+logger = logging.getLogger(__name__)
+
 # https://stackoverflow.com/questions/27910/finding-a-doi-in-a-document-or-page
 REGEX_DOI = (
     r'(?:'                      # optional prefix / url
@@ -35,6 +39,132 @@ REGEX_ISBN_13 = (
 )
 
 
+ARXIV_FLEXIBLE = re.compile(REGEX_ARXIV_FLEXIBLE)
+DOI = re.compile(REGEX_DOI)
+ISBN_10 = re.compile(REGEX_ISBN_10)
+ISBN_13 = re.compile(REGEX_ISBN_13)
+
+SENTINEL = '\n\x00'
+"""
+Separates the lines of a bibliography in a joined buffer.
+
+A match may still run across it (e.g. ``arxiv\\s*`` consumes the newline, and
+``.*?`` the NUL), so matches are checked against the bounds of their line (see
+:func:`._findall_lines`). Lines that contain a NUL are scanned separately.
+"""
+
+# In a joined buffer, the end of a line is followed by the sentinel, rather
+#  than by the end of the text.
+ISBN_10_BATCH = re.compile(REGEX_ISBN_10.replace('$', r'(?=\n?\n\x00)'))
+ISBN_13_BATCH = re.compile(REGEX_ISBN_13.replace('$', r'(?=\n?\n\x00)'))
+
+ARXIV_ID = re.compile(r'[0-9]{4}[.][0-9]{4}|/[0-9]{7}')
+"""Every arXiv identifier (old or new style) contains one of these."""
+
+ISBN_CHARACTERS = frozenset('-X 0123456789')
+"""An ISBN must be followed only by these (and an optional newline)."""
+
+TIMEOUT = 0.1
+"""Time budget (seconds) for each pattern on a single selection of text."""
+
+
+def _findall(pattern: Any, text: str) -> list:
+    """Find all matches of ``pattern`` in ``text``, within :const:`.TIMEOUT`."""
+    try:
+        matches: list = pattern.findall(text, timeout=TIMEOUT)
+    except TimeoutError:
+        # E.g. catastrophic backtracking on a garbage line.
+        logger.warning('Gave up looking for identifiers after %s seconds in'
+                       ' %r', TIMEOUT, text[:100])
+        return []
+    return matches
+
+
+def _could_contain_arxiv_id(text: str) -> bool:
+    return ARXIV_ID.search(text) is not None
+
+
+def _could_contain_doi(text: str) -> bool:
+    return '10.' in text
+
+
+def _could_contain_isbn(text: str) -> bool:
+    # Both ISBN patterns require the identifier to run to the end of the
+    #  text (``$``), and the last ten characters to be digits, separators, or
+    #  ``X``.
+    if text.endswith('\n'):
+        text = text[:-1]
+    return len(text) >= 10 and ISBN_CHARACTERS.issuperset(text[-10:])
+
+
+def _join(lines: Sequence[str], indexes: List[int]) -> tuple:
+    """Join the ``indexes`` of ``lines``, and get the offset of each."""
+    offsets = []
+    offset = 0
+    for i in indexes:
+        offsets.append(offset)
+        offset += len(lines[i]) + len(SENTINEL)
+    return ''.join([lines[i] + SENTINEL for i in indexes]), offsets
+
+
+def _found(match: Any) -> Any:
+    """Get what :meth:`findall` would have returned for ``match``."""
+    if match.re.groups == 0:
+        return match.group(0)
+    if match.re.groups == 1:
+        return match.group(1) or ''
+    return match.groups('')
+
+
+def _findall_lines(pattern: Any, lines: Sequence[str], indexes: List[int],
+                   batch_pattern: Any = None) -> Dict[int, list]:
+    """
+    Find all matches of ``pattern`` in each of the ``indexes`` of ``lines``.
+
+    The lines are scanned together, in a single pass over a buffer in which
+    they are separated by :const:`.SENTINEL`, and each match is assigned to
+    its line by offset. ``batch_pattern``, if given, is the equivalent of
+    ``pattern`` for the joined buffer.
+
+    A match that runs past the end of its line would not have been found in
+    the line on its own, and hides whatever the lines that it runs into would
+    have matched; those lines are scanned again, one by one.
+    """
+    found: Dict[int, list] = {}
+    joinable = []
+    for i in indexes:
+        if '\x00' in lines[i]:
+            found[i] = _findall(pattern, lines[i])
+        else:
+            joinable.append(i)
+    if not joinable:
+        return found
+    buffer, offsets = _join(lines, joinable)
+    try:
+        # The budget is per line, as if each was scanned separately.
+        matches = list((batch_pattern or pattern).finditer(
+            buffer, timeout=TIMEOUT * len(joinable)
+        ))
+    except TimeoutError:
+        logger.warning('Gave up looking for identifiers in %i lines after %s'
+                       ' seconds; scanning them one by one',
+                       len(joinable), TIMEOUT * len(joinable))
+        found.update({i: _findall(pattern, lines[i]) for i in joinable})
+        return found
+    rescan = set()
+    for match in matches:
+        k = bisect_right(offsets, match.start()) - 1
+        i = joinable[k]
+        if match.end() > offsets[k] + len(lines[i]):
+            last = bisect_right(offsets, match.end() - 1) - 1
+            rescan.update(joinable[k:last + 1])
+            continue
+        found.setdefault(i, []).append(_found(match))
+    for i in rescan:
+        found[i] = _findall(pattern, lines[i])
+    return found
+
+
 def longest_string(strings: List[str]) -> str:
     """Return the longest string from the bunch."""
     index, value = max(enumerate(strings), key=lambda x: len(x[1]))
@@ -66,22 +196,75 @@ def extract_identifiers(text: str) -> Reference:
                 ]
             }
     """
+    # The patterns are only applied to text that could match them, which is
+    #  a lot cheaper to check.
+    arxivids = []
+    if _could_contain_arxiv_id(text):
+        arxivids = _findall(ARXIV_FLEXIBLE, text)
+
+    dois = _findall(DOI, text) if _could_contain_doi(text) else []
+
+    isbn10: List[str] = []
+    isbn13: List[str] = []
+    if _could_contain_isbn(text):
+        isbn10 = _findall(ISBN_10, text)
+        isbn13 = _findall(ISBN_13, text)
+
+    document = _document(arxivids, dois, isbn10, isbn13)
+    return Reference(**document)    # type: ignore
+
+
+def extract_identifiers_batch(lines: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Get available ID metadata from each of the raw lines of a bibliography.
+
+    This finds the same identifiers as :func:`.extract_identifiers` on each
+    line, but each pattern is applied once, to all of the lines that could
+    match it (see :func:`._findall_lines`).
+
+    Parameters
+    ----------
+    lines : list
+        Raw text of each reference.
+
+    Returns
+    -------
+    list
+        For each line, a ``dict`` of the metadata found (if any), with the
+        keys ``arxiv_id``, ``doi`` and ``identifiers`` of :class:`Reference`.
+    """
+    everything = list(range(len(lines)))
+    buffer, offsets = _join(lines, everything)
+    arxiv_candidates = sorted({
+        bisect_right(offsets, match.start()) - 1
+        for match in ARXIV_ID.finditer(buffer)
+    })
+    arxivids = _findall_lines(ARXIV_FLEXIBLE, lines, arxiv_candidates)
+    dois = _findall_lines(DOI, lines, [
+        i for i in everything if _could_contain_doi(lines[i])
+    ])
+    isbn_candidates = [i for i in everything if _could_contain_isbn(lines[i])]
+    isbn10 = _findall_lines(ISBN_10, lines, isbn_candidates, ISBN_10_BATCH)
+    isbn13 = _findall_lines(ISBN_13, lines, isbn_candidates, ISBN_13_BATCH)
+    return [_document(arxivids.get(i, []), dois.get(i, []),
+                      isbn10.get(i, []), isbn13.get(i, []))
+            for i in everything]
+
+
+def _document(arxivids: list, dois: List[str], isbn10: List[str],
+              isbn13: List[str]) -> Dict[str, Any]:
+    """Gather the matches of each pattern for a line into metadata."""
     document: Dict[str, Any] = {}
-    arxivids = [longest_string(ID) for ID
-                in re.findall(REGEX_ARXIV_FLEXIBLE, text)]
+    arxivids = [longest_string(ID) for ID in arxivids]
     if arxivids:
         # if len(arxivids) > 1:
         #     document['arxiv_id'] = arxivids
         # else:
         document['arxiv_id'] = arxivids[0]
 
-    dois = re.findall(REGEX_DOI, text)
     if dois:
         document['doi'] = dois[0]
 
-    isbn10 = re.findall(REGEX_ISBN_10, text)
-    isbn13 = re.findall(REGEX_ISBN_13, text)
-
     # gather the identifiers one at a time
     identifiers: List[Identifier] = []
     if isbn10:
@@ -99,4 +282,4 @@ def extract_identifiers(text: str) -> Reference:
     if identifiers:
         document['identifiers'] = identifiers
 
-    return Reference(**document)    # type: ignore
+    return document
@@ -1,6 +1,8 @@
 """Tests for :mod:`references.process.extract.regex_identifiers`."""
 
+import random
 import unittest
+from unittest import mock
 from references.util import regex_identifiers, regex_arxiv
 import re
 
@@ -13,3 +15,147 @@ class TestIdentifierIsPresent(unittest.TestCase):
         raw = """B. Groisman, D. Kenigsberg, T. Mor, \u201dQuantumness\u201d versus \u201dClassicality\u201d of Quantum States, Preprint arXiv:quantph/0703103, (2007)"""
         document = regex_identifiers.extract_identifiers(raw)
         self.assertEqual(document.arxiv_id, 'quantph/0703103')
+
+
+class TestExtractIdentifiers(unittest.TestCase):
+    """Tests for :func:`.regex_identifiers.extract_identifiers`."""
+
+    def test_examples(self):
+        """The scanner finds the same identifiers as each pattern alone."""
+        for text in regex_arxiv.TEST_POSITIVE + regex_arxiv.TEST_NEGATIVE \
+                + ['doi: 10.1145/321105.321114', 'ISBN 978-3-16-148410-0',
+                   'foo, 0-306-40615-2\n', 'arXiv:hep-th/9901001v2']:
+            reference = regex_identifiers.extract_identifiers(text)
+            arxiv_ids = regex_identifiers.ARXIV_FLEXIBLE.findall(text)
+            self.assertEqual(
+                reference.arxiv_id,
+                regex_identifiers.longest_string(arxiv_ids[0])
+                if arxiv_ids else None
+            )
+            dois = regex_identifiers.DOI.findall(text)
+            self.assertEqual(reference.doi, dois[0] if dois else None)
+            self.assertEqual(
+                [ID.identifier for ID in reference.identifiers],
+                regex_identifiers.ISBN_10.findall(text)
+                + regex_identifiers.ISBN_13.findall(text)
+            )
+
+    def test_isbn(self):
+        """ISBNs are extracted as identifiers."""
+        reference = regex_identifiers.extract_identifiers(
+            'Some Book (2010), ISBN 978-3-16-148410-0'
+        )
+        self.assertIn('ISBN 978-3-16-148410-0',
+                      [ID.identifier for ID in reference.identifiers])
+        for ID in reference.identifiers:
+            self.assertEqual(ID.identifier_type, 'ISBN')
+
+    def test_patterns_are_skipped(self):
+        """Patterns that cannot match are not applied."""
+        with mock.patch.object(regex_identifiers, '_findall') as findall:
+            regex_identifiers.extract_identifiers('J. Smith, A title (2010)')
+            self.assertEqual(findall.call_count, 0)
+
+    def test_timeout(self):
+        """A pattern that takes too long finds nothing."""
+        pattern = mock.MagicMock()
+        pattern.findall.side_effect = TimeoutError
+        self.assertEqual(regex_identifiers._findall(pattern, 'foo'), [])
+
+    def test_real_timeout(self):
+        """The compiled patterns really are given a time budget."""
+        # Catastrophic backtracking: this would take hours without a timeout.
+        pattern = regex_identifiers.re.compile(r'(?:a|a)+$')
+        line = 'a' * 30 + '!'
+        self.assertEqual(regex_identifiers._findall(pattern, line), [])
+        self.assertEqual(
+            regex_identifiers._findall_lines(pattern, [line, line], [0, 1]),
+            {0: [], 1: []}
+        )
+        self.assertEqual(
+            regex_identifiers.DOI.findall('doi: 10.1145/321105.321114',
+                                          timeout=regex_identifiers.TIMEOUT),
+            ['10.1145/321105.321114']
+        )
+
+
+class TestExtractIdentifiersBatch(unittest.TestCase):
+    """Tests for :func:`.regex_identifiers.extract_identifiers_batch`."""
+
+    LINES = regex_arxiv.TEST_POSITIVE + regex_arxiv.TEST_NEGATIVE + [
+        'doi: 10.1145/321105.321114', 'ISBN 978-3-16-148410-0',
+        'foo, 0-306-40615-2\n', 'arXiv:hep-th/9901001v2', '',
+        # Nothing should match across lines.
+        'see arXiv', '(', '0801.0012)', 'arXiv:\n', 'hep-th/9901001',
+        '0-306-40615-2 trailing', 'ISBN 978-3-16-148410-0\n\n',
+        'a NUL \x00 arXiv:1503.01017', 'two ids 1503.01017, hep-th/9901001',
+    ]
+
+    def test_same_as_each_line(self):
+        """Each line gets the same identifiers as on its own."""
+        batch = regex_identifiers.extract_identifiers_batch(self.LINES)
+        self.assertEqual(len(batch), len(self.LINES))
+        for text, partial in zip(self.LINES, batch):
+            reference = regex_identifiers.extract_identifiers(text)
+            self.assertEqual(partial.get('arxiv_id'), reference.arxiv_id,
+                             text)
+            self.assertEqual(partial.get('doi'), reference.doi, text)
+            self.assertEqual(partial.get('identifiers', []),
+                             reference.identifiers, text)
+
+    def test_match_across_lines(self):
+        """A match that runs into the next line is not used."""
+        batch = regex_identifiers.extract_identifiers_batch([
+            'Smith J., pp. 1234.5678, see arXiv',
+            'Jones K., Math. RT/0903.2992'
+        ])
+        self.assertEqual([partial.get('arxiv_id') for partial in batch],
+                         [None, '0903.2992'])
+
+    def test_random_batches(self):
+        """Random batches of lines get the same identifiers as each line."""
+        pieces = self.LINES + [
+            'Smith J., pp. 1234.5678, see arXiv', 'Math. RT/0903.2992',
+            'e-print', 'hep-th', '[', ']', 'arXiv,', 'doi:', '10.1000/x',
+            '978-3-16-148410-0', 'ISBN', ' ', '\n'
+        ]
+        rand = random.Random(1)
+        for _ in range(300):
+            lines = [' '.join(rand.choice(pieces)
+                              for _ in range(rand.randint(1, 3)))
+                     for _ in range(rand.randint(1, 8))]
+            batch = regex_identifiers.extract_identifiers_batch(lines)
+            for text, partial in zip(lines, batch):
+                reference = regex_identifiers.extract_identifiers(text)
+                self.assertEqual(
+                    (partial.get('arxiv_id'), partial.get('doi'),
+                     partial.get('identifiers', [])),
+                    (reference.arxiv_id, reference.doi,
+                     reference.identifiers),
+                    lines
+                )
+
+    def test_one_pass(self):
+        """Each pattern is applied once, to all of the candidate lines."""
+        with mock.patch.object(regex_identifiers, 'ARXIV_FLEXIBLE') as arxiv:
+            arxiv.finditer.return_value = []
+            regex_identifiers.extract_identifiers_batch(
+                ['arXiv:1503.01017', 'J. Smith (2010)', 'hep-th/9901001']
+            )
+            self.assertEqual(arxiv.finditer.call_count, 1)
+            buffer = arxiv.finditer.call_args[0][0]
+            self.assertEqual(buffer.split(regex_identifiers.SENTINEL),
+                             ['arXiv:1503.01017', 'hep-th/9901001', ''])
+
+    def test_timeout(self):
+        """If the batch takes too long, each line is scanned on its own."""
+        with mock.patch.object(regex_identifiers, 'DOI') as pattern:
+            pattern.finditer.side_effect = TimeoutError
+            pattern.findall.return_value = ['10.1145/321105.321114']
+            batch = regex_identifiers.extract_identifiers_batch(
+                ['doi: 10.1145/321105.321114', 'nope', 'doi:10.1145/1']
+            )
+        self.assertEqual([partial.get('doi') for partial in batch],
+                         ['10.1145/321105.321114', None,
+                          '10.1145/321105.321114'])
+        self.assertEqual(pattern.findall.call_count, 2)